@@ -0,0 +1,40 @@
+"""add_pending_plan_block_index
+
+Revision ID: 3f6a2c9d1e47
+Revises: ef83184b2739
+Create Date: 2026-10-17 10:12:04.518233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6a2c9d1e47'
+down_revision = 'ef83184b2739'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partial index so clear_previous_approvals only touches plan blocks that
+    # still await approval instead of scanning every block of every message.
+    # CONCURRENTLY cannot run inside a transaction, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_message_content_pending_plan',
+            'message_content',
+            ['chat_message_id'],
+            unique=False,
+            postgresql_where=sa.text("type = 'plan' AND needs_approval"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_message_content_pending_plan',
+            table_name='message_content',
+            postgresql_concurrently=True,
+        )
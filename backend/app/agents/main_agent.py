@@ -17,6 +17,7 @@ from typing import List, Dict, Any, Optional, Literal, Annotated
 import json
 import re
 import os
+import hashlib
 from datetime import datetime
 import logging
 from langchain_core.runnables import RunnableConfig
@@ -41,7 +42,8 @@ class MainAgent:
         logs_dir: str = None,
         checkpointer=None,
         store=None,
-        use_postgres_checkpointer: bool = True
+        use_postgres_checkpointer: bool = True,
+        render_graph: bool = True
     ):
         self.llm = llm
         self.db_path = db_path
@@ -108,17 +110,44 @@ class MainAgent:
         
         # Build the graph
         self.graph = self.create_graph()
-        self.save_graph_visualization()
+        if render_graph:
+            self.save_graph_visualization()
     
-    def save_graph_visualization(self):
+    def save_graph_visualization(self) -> Optional[bool]:
+        """
+        Render the graph to main_agent_graph.png unless it is unchanged.
+        
+        The node/edge structure is hashed and stored next to the PNG; when the
+        hash matches the previous render the (remote) mermaid render is skipped.
+        Returns True if a new image was written, False if the cached image was
+        kept, and None if rendering failed.
+        """
         try:
-            graph_image = self.graph.get_graph().draw_mermaid_png()
+            graph = self.graph.get_graph()
+            structure = repr((
+                sorted(graph.nodes),
+                sorted((e.source, e.target, e.conditional) for e in graph.edges)
+            ))
+            graph_hash = hashlib.blake2b(structure.encode(), digest_size=16).hexdigest()
+            
             graph_path = os.path.join(self.logs_dir, "main_agent_graph.png")
+            hash_path = os.path.join(self.logs_dir, ".graph_hash")
+            if os.path.exists(graph_path) and os.path.exists(hash_path):
+                with open(hash_path, "r", encoding="utf-8") as f:
+                    if f.read().strip() == graph_hash:
+                        logger.info(f"Graph unchanged, keeping cached visualization: {graph_path}")
+                        return False
+            
+            graph_image = graph.draw_mermaid_png()
             with open(graph_path, "wb") as f:
                 f.write(graph_image)
+            with open(hash_path, "w", encoding="utf-8") as f:
+                f.write(graph_hash)
             logger.info(f"Graph visualization saved to: {graph_path}")
+            return True
         except Exception as e:
             logger.error(f"Failed to generate graph visualization: {e}")
+            return None
     
     def create_handoff_tools(self):
         """Create handoff tools for assistant agent routing."""
@@ -5,7 +5,7 @@ Automatically passes LLM instance and database engine to custom tools.
 
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel
-from typing import List, Any, Optional
+from typing import List, Any, Optional, Union
 from pydantic import Field
 from .visualization_tools import SmartTransformForVizTool, LargePlottingTool
 from .data_analysis_tools import SecurePythonREPLTool, DataFrameInfoTool
@@ -45,6 +45,7 @@ class CustomToolkit(BaseModel):
     
 # Using Blip for VQA model
 # Put this here to initialize one for now.
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import ExitStack
 from PIL import Image
 
@@ -72,18 +73,38 @@ class VisualQA():
         self.model = VisualQA._model
         self.processor = VisualQA._processor
 
-    def answer_questions(self, image_paths: List[str], query: str, batch_size: int = 10):
+    def _prepare_images(self, batch_paths: List[Union[str, Image.Image]]):
+        with ExitStack() as stack:
+            # Already-decoded images are used as-is; paths are opened per batch
+            images = [
+                image_path if isinstance(image_path, Image.Image)
+                else stack.enter_context(Image.open(image_path))
+                for image_path in batch_paths
+            ]
+            return self.processor.image_processor(images, return_tensors="pt")["pixel_values"] # type: ignore
+
+    def answer_questions(self, image_paths: List[Union[str, Image.Image]], query: str, batch_size: int = 10):
+        batches = [image_paths[i : i + batch_size] for i in range(0, len(image_paths), batch_size)]
+        if not batches:
+            return []
+
         results = []
-        for i in range(0, len(image_paths), batch_size):
-            batch_paths = image_paths[i : i + batch_size]
-            with ExitStack() as stack:
-                images = [stack.enter_context(Image.open(image_path)) for image_path in batch_paths]
-                queries = [query] * len(images)
-                inputs = self.processor(
-                    images=images, 
-                    text=queries, 
-                    return_tensors="pt",  # type: ignore
-                    padding=True) # type: ignore
+        # Decode/preprocess the next batch's images on a worker thread while the
+        # model runs the current one; generate() releases the GIL inside torch ops.
+        # Tokenizer calls stay on this thread: the fast tokenizer is not safe to
+        # use from two threads at once ("Already borrowed").
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            pending = prefetcher.submit(self._prepare_images, batches[0])
+            for batch, next_batch in zip(batches, batches[1:] + [None]):
+                pixel_values = pending.result()
+                if next_batch is not None:
+                    pending = prefetcher.submit(self._prepare_images, next_batch)
+
+                inputs = self.processor.tokenizer( # type: ignore
+                    [query] * len(batch),
+                    return_tensors="pt",
+                    padding=True)
+                inputs["pixel_values"] = pixel_values
                 outputs = self.model.generate(**inputs, max_length=20) # type: ignore
 
                 # results.extend([self.processor.decode(o, skip_special_tokens=True) for o in outputs])
@@ -206,7 +206,7 @@ class SecurePythonREPLTool(BaseTool):
                         # Continue anyway - code might define its own df
                     else:
                         # Extend TTL since we're using the DataFrame
-                        redis_service.extend_ttl(data_context.df_id)
+                        redis_service.extend_ttl_nowait(data_context.df_id)
                         logger.info(f"Loaded DataFrame {data_context.df_id} for Python execution")
             
             logger.info(f"Executing Python code in subprocess (uses_df={uses_df}, df_loaded={df is not None})")
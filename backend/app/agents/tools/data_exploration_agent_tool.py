@@ -18,6 +18,7 @@ from sqlalchemy import create_engine
 
 from app.services.redis_dataframe_service import get_redis_dataframe_service
 from app.schemas.chat import DataContext
+from app.utils.serialization_utils import safe_json_dumps, serialize_dataframe
 
 logger = logging.getLogger(__name__)
 
@@ -192,9 +193,9 @@ Your final answer must be ONLY the SQL query, no explanation.""")
             except Exception as e:
                  logger.error(f"Redis storage failed: {str(e)}")
                  # Fallback: still return data, but warn about caching
-                 return json.dumps({
+                 return safe_json_dumps({
                      "error": "Data retrieved but caching failed.",
-                     "data": df.head(5).to_dict(orient='records'),
+                     "data": serialize_dataframe(df, max_rows=5),
                      "sql_query": sql_query
                  })
 
@@ -217,7 +218,7 @@ Your final answer must be ONLY the SQL query, no explanation.""")
             
             # Return payload including small preview of data
             # This helps the LLM know immediately what it got without needing another tool call usually
-            preview_data = df.head(5).to_dict(orient='records')
+            preview_data = serialize_dataframe(df, max_rows=5)
             
             payload = {
                 "data_context": data_context.model_dump(mode="json"),
@@ -227,7 +228,7 @@ Your final answer must be ONLY the SQL query, no explanation.""")
                 "sql_query": sql_query
             }
             
-            return json.dumps(payload, default=str)
+            return safe_json_dumps(payload)
             
         except Exception as e:
             logger.error(f"DataExplorationAgentTool fatal error: {str(e)}")
@@ -142,7 +142,7 @@ class SmartTransformForVizTool(BaseTool):
                 return json.dumps({"error": f"DataFrame {data_context.df_id} not found or expired. Please run the SQL query again using sql_db_to_df tool."})
             
             # Extend TTL since we're using the DataFrame
-            redis_service.extend_ttl(data_context.df_id)
+            redis_service.extend_ttl_nowait(data_context.df_id)
             
             logger.info(f"Using DataFrame {data_context.df_id} with shape {df.shape} for visualization")
             
@@ -387,7 +387,7 @@ class LargePlottingTool(BaseTool):
                 return f"Error: DataFrame {data_context.df_id} not found or expired. Please run the SQL query again using sql_db_to_df tool."
             
             # Extend TTL since we're using the DataFrame
-            redis_service.extend_ttl(data_context.df_id)
+            redis_service.extend_ttl_nowait(data_context.df_id)
             
             logger.info(f"Using DataFrame {data_context.df_id} with shape {df.shape} for plotting")
             
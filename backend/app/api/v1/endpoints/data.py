@@ -16,6 +16,7 @@ from app.schemas.data import (
     RecreateDataFrameResponse
 )
 from app.schemas.conversation import DataContext
+from app.utils.serialization_utils import serialize_dataframe
 
 logger = logging.getLogger(__name__)
 
@@ -43,14 +44,14 @@ async def get_dataframe_preview(
     try:
         logger.info(f"Fetching preview for DataFrame: {df_id}")
         
-        if not redis_service.exists(df_id):
+        if not await redis_service.aexists(df_id):
             return DataFramePreviewResponse(
                 status="error",
                 message="DataFrame not found or expired",
                 errors=[{"code": "DATAFRAME_NOT_FOUND", "message": "DataFrame not found or expired"}]
             )
             
-        df = redis_service.get_dataframe(df_id)
+        df = await redis_service.aget_dataframe(df_id)
         if df is None:
             return DataFramePreviewResponse(
                 status="error",
@@ -59,14 +60,11 @@ async def get_dataframe_preview(
             )
             
         # Get metadata
-        metadata = redis_service.get_metadata(df_id)
+        metadata = await redis_service.aget_metadata(df_id)
         
-        # Convert to records for frontend display
+        # Convert to records for frontend display (NaN -> None)
         # Limit to 100 rows for preview
-        preview_df = df.head(100)
-        
-        # Handle NaN/Infinity for JSON serialization
-        records = preview_df.where(pd.notnull(preview_df), None).to_dict(orient='records')
+        records = serialize_dataframe(df, max_rows=100)
         
         return DataFramePreviewResponse(
             data=DataFramePreviewData(
@@ -118,7 +116,7 @@ async def recreate_dataframe(
             )
 
         # Store DataFrame in Redis and build context
-        context = redis_service.store_dataframe(
+        context = await redis_service.astore_dataframe(
             df=df,
             sql_query=request_body.sql_query,
             metadata={
@@ -152,8 +150,7 @@ async def recreate_dataframe(
                 state_error,
             )
 
-        preview_df = df.head(100)
-        records = preview_df.where(pd.notnull(preview_df), None).to_dict(orient="records")
+        records = serialize_dataframe(df, max_rows=100)
 
         return RecreateDataFrameResponse(
             data=RecreateDataFrameData(
@@ -58,7 +58,7 @@ async def get_profile(
     }
     """
     try:
-        profile_data = profile_service.get_profile(current_user.user_id)
+        profile_data = await profile_service.get_profile(current_user.user_id)
         
         if not profile_data:
             raise HTTPException(status_code=404, detail="Profile not found")
@@ -95,7 +95,7 @@ async def update_profile(
         if not updates:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        success = profile_service.update_profile(current_user.user_id, updates)
+        success = await profile_service.update_profile(current_user.user_id, updates)
         
         if not success:
             raise HTTPException(status_code=400, detail="Failed to update profile")
@@ -73,6 +73,7 @@ class Settings(BaseSettings):
     redis_db: int = 0
     redis_password: str = ""
     redis_ttl: int = 3600  # DataFrame TTL in seconds (1 hour)
+    redis_max_connections: int = 50  # Shared connection pool size per process
 
     # Logging Configuration
     logs_dir: str = "logs"
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional, List
 from sqlalchemy import (
     String, Integer, BigInteger, DateTime, Boolean, Enum as SQLEnum, 
-    ForeignKey, Index, Text, func
+    ForeignKey, Index, Text, func, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import JSONB
@@ -144,6 +144,11 @@ class MessageContent(Base):
     __table_args__ = (
         Index('idx_message_content_message_created', 'chat_message_id', 'created_at'),
         Index('idx_message_content_message_sequence', 'chat_message_id', 'sequence'),
+        Index(
+            'idx_message_content_pending_plan',
+            'chat_message_id',
+            postgresql_where=text("type = 'plan' AND needs_approval")
+        ),
     )
     
     def __repr__(self):
@@ -4,11 +4,11 @@ import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, asc
+from sqlalchemy import select, asc, delete, and_, literal
 from sqlalchemy.exc import SQLAlchemyError
 
 from .base_repository import BaseRepository
-from app.models.chat import MessageContent, MessageStatusEnum
+from app.models.chat import ChatMessage, MessageContent, MessageStatusEnum, SenderEnum
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +19,42 @@ class MessageContentRepository(BaseRepository[MessageContent]):
     def __init__(self, session: AsyncSession):
         super().__init__(session, MessageContent)
     
+    def _build_content(
+        self,
+        chat_message_id: str,
+        block: Dict[str, Any],
+        sequence: int
+    ) -> Optional[MessageContent]:
+        """Convert a frontend block dict into a MessageContent entity (None if invalid)."""
+        needs_approval = block.get('needsApproval', block.get('needs_approval', False))
+        block_id = block.get('id', block.get('block_id'))
+        block_type = block.get('type')
+        block_data = block.get('data', {})
+        message_status = block.get('messageStatus', block.get('message_status'))
+        
+        if not block_id or not block_type:
+            logger.warning("Skipping block with missing id or type: %s", block)
+            return None
+        
+        # Convert message_status string to enum if needed
+        if message_status and isinstance(message_status, str):
+            try:
+                message_status = MessageStatusEnum(message_status)
+            except ValueError:
+                logger.warning("Invalid message_status: %s", message_status)
+                message_status = None
+        
+        return MessageContent(
+            chat_message_id=chat_message_id,
+            block_id=block_id,
+            type=block_type,
+            needs_approval=needs_approval,
+            message_status=message_status,
+            data=block_data,
+            sequence=sequence,
+            created_at=datetime.now()
+        )
+    
     async def add_content_blocks(
         self, 
         chat_message_id: str,  # Message ID UUID string from message_id field
@@ -40,47 +76,59 @@ class MessageContentRepository(BaseRepository[MessageContent]):
             
             content_entities = []
             for block in blocks:
-               
-                needs_approval = block.get('needsApproval', block.get('needs_approval', False))
-                block_id = block.get('id', block.get('block_id'))
-                block_type = block.get('type')
-                block_data = block.get('data', {})
-                message_status = block.get('messageStatus', block.get('message_status'))
-                
-                if not block_id or not block_type:
-                    logger.warning(f"Skipping block with missing id or type: {block}")
-                    continue
-                
-                # Convert message_status string to enum if needed
-                if message_status and isinstance(message_status, str):
-                    try:
-                        message_status = MessageStatusEnum(message_status)
-                    except ValueError:
-                        logger.warning(f"Invalid message_status: {message_status}")
-                        message_status = None
-                
-                content = MessageContent(
-                    chat_message_id=chat_message_id,
-                    block_id=block_id,
-                    type=block_type,
-                    needs_approval=needs_approval,
-                    message_status=message_status,
-                    data=block_data,
-                    created_at=datetime.now()
-                )
-                content_entities.append(content)
+                content = self._build_content(chat_message_id, block, len(content_entities))
+                if content is not None:
+                    content_entities.append(content)
             
             if content_entities:
                 self.session.add_all(content_entities)
                 await self.session.flush()
-                logger.info(f"Inserted {len(content_entities)} content blocks for message {chat_message_id}")
+                logger.info("Inserted %s content blocks for message %s", len(content_entities), chat_message_id)
                 return True
             return True
         except SQLAlchemyError as e:
-            logger.error(f"Error adding content blocks for message {chat_message_id}: {e}")
+            logger.error("Error adding content blocks for message %s: %s", chat_message_id, e)
             await self.session.rollback()
             raise Exception(f"Failed to add content blocks: {e}")
     
+    async def replace_content_blocks(
+        self,
+        chat_message_id: str,
+        blocks: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Replace all content blocks of a message in one batch.
+        
+        Issues a single DELETE followed by one bulk INSERT (sequences assigned
+        by position) within the session's transaction, instead of a
+        SELECT + INSERT round-trip per block.
+        
+        Args:
+            chat_message_id: Chat message ID
+            blocks: List of block dictionaries in frontend format
+            
+        Returns:
+            Number of blocks inserted
+        """
+        try:
+            await self.session.execute(
+                delete(MessageContent).where(MessageContent.chat_message_id == chat_message_id)
+            )
+            
+            content_entities = []
+            for block in blocks:
+                content = self._build_content(chat_message_id, block, len(content_entities))
+                if content is not None:
+                    content_entities.append(content)
+            
+            self.session.add_all(content_entities)
+            await self.session.flush()
+            return len(content_entities)
+        except SQLAlchemyError as e:
+            logger.error("Error replacing content blocks for message %s: %s", chat_message_id, e)
+            await self.session.rollback()
+            raise Exception(f"Failed to replace content blocks: {e}")
+    
     async def add_content_block_with_sequence(
         self,
         chat_message_id: str,
@@ -93,41 +141,16 @@ class MessageContentRepository(BaseRepository[MessageContent]):
             existing_blocks = result.scalars().all()
             next_sequence = len(existing_blocks)  # 0-indexed
             
-            needs_approval = block.get('needsApproval', block.get('needs_approval', False))
-            block_id = block.get('id', block.get('block_id'))
-            block_type = block.get('type')
-            block_data = block.get('data', {})
-            message_status = block.get('messageStatus', block.get('message_status'))
-            
-            if not block_id or not block_type:
-                logger.warning(f"Skipping block with missing id or type: {block}")
+            content = self._build_content(chat_message_id, block, next_sequence)
+            if content is None:
                 return False
             
-            # Convert message_status string to enum if needed
-            if message_status and isinstance(message_status, str):
-                try:
-                    message_status = MessageStatusEnum(message_status)
-                except ValueError:
-                    logger.warning(f"Invalid message_status: {message_status}")
-                    message_status = None
-            
-            content = MessageContent(
-                chat_message_id=chat_message_id,
-                block_id=block_id,
-                type=block_type,
-                needs_approval=needs_approval,
-                message_status=message_status,
-                data=block_data,
-                sequence=next_sequence,  # Auto-assigned sequence
-                created_at=datetime.now()
-            )
-            
             self.session.add(content)
             await self.session.flush()
-            logger.info(f"Inserted content block {block_id} with sequence {next_sequence} for message {chat_message_id}")
+            logger.info("Inserted content block %s with sequence %s for message %s", content.block_id, next_sequence, chat_message_id)
             return True
         except SQLAlchemyError as e:
-            logger.error(f"Error adding content block for message {chat_message_id}: {e}")
+            logger.error("Error adding content block for message %s: %s", chat_message_id, e)
             await self.session.rollback()
             raise Exception(f"Failed to add content block: {e}")
     
@@ -163,19 +186,112 @@ class MessageContentRepository(BaseRepository[MessageContent]):
             
             return blocks
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving blocks for message {chat_message_id}: {e}")
+            logger.error("Error retrieving blocks for message %s: %s", chat_message_id, e)
             raise Exception(f"Failed to retrieve content blocks: {e}")
     
-    async def update_block(self, block_id: str, updates: Dict[str, Any]) -> bool:
+    async def get_pending_plan_block_ids(self, thread_id: str) -> List[str]:
+        """
+        Get block IDs of assistant plan blocks in a thread that still need approval.
+        
+        Served by idx_chat_messages_thread_sender (thread_id, sender) joined to the
+        partial idx_message_content_pending_plan index, so keep the filters below
+        aligned with that index predicate (type = 'plan' AND needs_approval):
+        the bare boolean column rather than IS true, and 'plan' inlined as a SQL
+        literal so generic prepared-statement plans can still match the index.
+        
+        Args:
+            thread_id: Thread ID
+            
+        Returns:
+            List of block IDs
+        """
+        try:
+            stmt = (
+                select(MessageContent.block_id)
+                .join(ChatMessage, ChatMessage.message_id == MessageContent.chat_message_id)
+                .where(
+                    ChatMessage.thread_id == thread_id,
+                    ChatMessage.sender == SenderEnum.ASSISTANT,
+                    MessageContent.type == literal("plan", literal_execute=True),
+                    MessageContent.needs_approval
+                )
+            )
+            result = await self.session.execute(stmt)
+            return list(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error("Error finding pending plan blocks for thread %s: %s", thread_id, e)
+            raise Exception(f"Failed to find pending plan blocks: {e}")
+    
+    async def get_block_state(
+        self,
+        thread_id: str,
+        message_id: str,
+        block_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get the approval state of a block, checking its message exists in the thread.
+        
+        Args:
+            thread_id: Thread ID
+            message_id: Message ID the block belongs to
+            block_id: Block ID
+            
+        Returns:
+            None if the message is not in the thread, an empty dict if the block
+            does not exist, otherwise a dict with needs_approval and message_status
+        """
+        try:
+            stmt = (
+                select(
+                    MessageContent.block_id,
+                    MessageContent.needs_approval,
+                    MessageContent.message_status
+                )
+                .select_from(ChatMessage)
+                .outerjoin(
+                    MessageContent,
+                    and_(
+                        MessageContent.chat_message_id == ChatMessage.message_id,
+                        MessageContent.block_id == block_id
+                    )
+                )
+                .where(
+                    ChatMessage.thread_id == thread_id,
+                    ChatMessage.message_id == message_id
+                )
+                .limit(1)
+            )
+            result = await self.session.execute(stmt)
+            row = result.first()
+            if row is None:
+                return None
+            if row.block_id is None:
+                return {}
+            return {
+                "needs_approval": row.needs_approval,
+                "message_status": row.message_status
+            }
+        except SQLAlchemyError as e:
+            logger.error("Error retrieving state of block %s: %s", block_id, e)
+            raise Exception(f"Failed to retrieve block state: {e}")
+    
+    async def update_block(
+        self,
+        block_id: str,
+        updates: Dict[str, Any],
+        current: Optional[Dict[str, Any]] = None
+    ) -> bool:
         """
         Update a content block by block_id.
         
         Args:
             block_id: Block ID to update
             updates: Dictionary with needsApproval, messageStatus, or data
+            current: Optional current block state (from get_block_state); when every
+                normalized update already matches it, the UPDATE is skipped
             
         Returns:
-            True if updated
+            True if updated (or already up to date)
         """
         try:
             # Normalize field names for updates
@@ -194,7 +310,7 @@ class MessageContentRepository(BaseRepository[MessageContent]):
                     try:
                         normalized_updates['message_status'] = MessageStatusEnum(status)
                     except ValueError:
-                        logger.warning(f"Invalid messageStatus: {status}")
+                        logger.warning("Invalid messageStatus: %s", status)
                 else:
                     normalized_updates['message_status'] = status
             if 'message_status' in updates:
@@ -213,16 +329,22 @@ class MessageContentRepository(BaseRepository[MessageContent]):
                 normalized_updates['data'] = updates['data']
             
             if not normalized_updates:
-                logger.warning(f"No valid updates provided for block {block_id}")
+                logger.warning("No valid updates provided for block %s", block_id)
                 return False
             
+            if current and all(
+                k in current and current[k] == v for k, v in normalized_updates.items()
+            ):
+                logger.info("Block %s already up to date, skipping update", block_id)
+                return True
+            
             result = await self.update_by_id(block_id, normalized_updates, id_field="block_id")
             
             if result:
-                logger.info(f"Updated block {block_id} with fields: {list(normalized_updates.keys())}")
+                logger.info("Updated block %s with fields: %s", block_id, list(normalized_updates.keys()))
             return result
         except SQLAlchemyError as e:
-            logger.error(f"Error updating block {block_id}: {e}")
+            logger.error("Error updating block %s: %s", block_id, e)
             raise Exception(f"Failed to update block: {e}")
     
     async def delete_blocks_by_message_id(self, chat_message_id: str) -> int:
@@ -237,10 +359,10 @@ class MessageContentRepository(BaseRepository[MessageContent]):
         """
         try:
             result = await self.delete_many({"chat_message_id": chat_message_id})
-            logger.info(f"Deleted {result} content blocks for message {chat_message_id}")
+            logger.info("Deleted %s content blocks for message %s", result, chat_message_id)
             return result
         except SQLAlchemyError as e:
-            logger.error(f"Error deleting blocks for message {chat_message_id}: {e}")
+            logger.error("Error deleting blocks for message %s: %s", chat_message_id, e)
             raise Exception(f"Failed to delete content blocks: {e}")
     
     async def get_block_by_id(self, block_id: str) -> Optional[MessageContent]:
@@ -256,5 +378,5 @@ class MessageContentRepository(BaseRepository[MessageContent]):
         try:
             return await self.find_by_id(block_id, id_field="block_id")
         except Exception as e:
-            logger.error(f"Error finding block {block_id}: {e}")
+            logger.error("Error finding block %s: %s", block_id, e)
             return None
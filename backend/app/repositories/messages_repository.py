@@ -3,7 +3,7 @@
 import logging
 from typing import Dict, Any, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, asc, func, distinct
+from sqlalchemy import select, desc, asc, func, distinct, literal
 from sqlalchemy.exc import SQLAlchemyError
 
 from .base_repository import BaseRepository
@@ -75,6 +75,36 @@ class MessagesRepository(BaseRepository[ChatMessage]):
             logger.error(f"Error finding message {message_id} in thread {thread_id}: {e}")
             raise Exception(f"Failed to find message: {e}")
     
+    async def exists(
+        self,
+        thread_id: str,
+        message_id: str,
+        sender: Optional[str] = None
+    ) -> bool:
+        """
+        Check whether a message exists within a thread without loading it.
+        
+        Args:
+            thread_id: Thread ID
+            message_id: Message ID
+            sender: Optional sender the message must belong to
+            
+        Returns:
+            True if a matching message exists
+        """
+        try:
+            stmt = select(literal(1)).where(
+                ChatMessage.thread_id == thread_id,
+                ChatMessage.message_id == message_id
+            )
+            if sender is not None:
+                stmt = stmt.where(ChatMessage.sender == sender)
+            result = await self.session.execute(stmt.limit(1))
+            return result.scalar() is not None
+        except SQLAlchemyError as e:
+            logger.error(f"Error checking message {message_id} in thread {thread_id}: {e}")
+            raise Exception(f"Failed to check message existence: {e}")
+    
     async def delete_message(self, message: ChatMessage) -> bool:
         """
         Delete a message.
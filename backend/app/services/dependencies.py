@@ -1,5 +1,7 @@
 """Dependency injection for repositories and services."""
 
+import asyncio
+import logging
 from typing import Optional
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,11 +15,19 @@ from app.repositories.messages_repository import MessagesRepository
 from app.services.chat_thread_service import ChatThreadService
 from app.services.message_management_service import MessageManagementService
 from app.services.agent_service import AgentService
-from app.services.redis_dataframe_service import RedisDataFrameService
+from app.services.redis_dataframe_service import (
+    RedisDataFrameService,
+    close_async_redis_connection_pool
+)
 from app.services.storage_service import SupabaseStorageService
 from app.services.profile_service import ProfileService
 from app.services.memory_service import MemoryService
 
+logger = logging.getLogger(__name__)
+
+# Seconds shutdown waits for buffered Redis writes to be sent
+REDIS_FLUSH_TIMEOUT = 5.0
+
 
 # ==================== Repository Dependencies ====================
 
@@ -129,6 +139,17 @@ def initialize_agent_service(llm, db_path: str, use_postgres_checkpointer: bool
     return _agent_service
 
 
+async def shutdown_services() -> None:
+    """Release network clients held by the singleton services."""
+    if _profile_service is not None:
+        await _profile_service.close()
+    if _redis_df_service is not None:
+        # Send TTL refreshes still buffered in the pipelined writer before exit
+        if not await asyncio.to_thread(_redis_df_service.flush, REDIS_FLUSH_TIMEOUT):
+            logger.warning("Timed out flushing pending Redis writes on shutdown")
+    await close_async_redis_connection_pool()
+
+
 def reset_services() -> None:
     global _agent_service, _redis_df_service, _storage_service, _profile_service, _memory_service
     
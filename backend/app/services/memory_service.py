@@ -25,9 +25,10 @@ class MemoryService:
     
     def __init__(self):
         try:
-            from supabase import create_client, Client
+            from supabase import Client
+            from app.services.storage_service import get_supabase_client
             
-            self.supabase_client: Client = create_client(
+            self.supabase_client: Client = get_supabase_client(
                 app_settings.supabase_url,
                 app_settings.supabase_service_role_key
             )
@@ -6,6 +6,8 @@ import time
 from typing import Dict, Any, List, Optional, Literal
 from datetime import datetime
 
+from sqlalchemy import asc
+
 from app.repositories.messages_repository import MessagesRepository
 from app.repositories.chat_thread_repository import ChatThreadRepository
 from app.repositories.message_content_repository import MessageContentRepository
@@ -13,6 +15,39 @@ from app.models.chat import ChatMessage
 
 logger = logging.getLogger(__name__)
 
+MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB
+_NULL_BYTE_TABLE = {0: None}
+
+_TEXT_BLOCK_TEMPLATE = {"type": "text", "needsApproval": False}
+
+# Block fields clients may change through update_block_status
+_BLOCK_STATUS_FIELDS = frozenset({'needsApproval', 'messageStatus', 'message_status'})
+
+
+def _normalize_blocks(
+    content: Optional[Any],
+    content_blocks: Optional[List[Dict[str, Any]]],
+    message_id: Optional[Any]
+) -> List[Dict[str, Any]]:
+    """
+    Normalize message content into a list of blocks.
+    
+    content_blocks wins if provided (backward compat); a non-blank string
+    becomes a single text block and a list is used as-is.
+    """
+    if content_blocks is not None:
+        return content_blocks
+    if isinstance(content, list):
+        return content
+    if isinstance(content, str) and content.strip():
+        block_suffix = message_id or time.time_ns() // 1_000_000
+        return [{
+            **_TEXT_BLOCK_TEMPLATE,
+            "id": f"text_{block_suffix}",
+            "data": {"text": content}
+        }]
+    return []
+
 
 class MessageManagementService:
 
@@ -50,27 +85,9 @@ class MessageManagementService:
             # Generate message ID if not provided
             if message_id is None:
                 message_id = str(uuid.uuid4())
-                logger.info(f"Generated message_id: {message_id} for thread {thread_id}")
-            
-            # Normalize content: use content_blocks if provided (backward compat), otherwise use content
-            # If content is a string, convert it to a text block
-            if content_blocks is not None:
-                blocks = content_blocks
-            elif content is not None:
-                if isinstance(content, str) and content.strip():
-                    # Convert string content to a text block
-                    blocks = [{
-                        "id": f"text_{message_id or int(time.time() * 1000)}",
-                        "type": "text",
-                        "needsApproval": False,
-                        "data": {"text": content}
-                    }]
-                elif isinstance(content, list):
-                    blocks = content
-                else:
-                    blocks = []
-            else:
-                blocks = []
+                logger.info("Generated message_id: %s for thread %s", message_id, thread_id)
+            
+            blocks = _normalize_blocks(content, content_blocks, message_id)
             
             # Create message object with empty content array (blocks stored separately)
             # Create message object
@@ -84,7 +101,7 @@ class MessageManagementService:
             
             if user_id:
                 logger.info(
-                    f"Saving user message {message_id} to thread {thread_id} with user_id: {user_id}"
+                    "Saving user message %s to thread %s with user_id: %s", message_id, thread_id, user_id
                 )
             
             # Save message to database FIRST to get the auto-generated id
@@ -93,7 +110,7 @@ class MessageManagementService:
                 if not success:
                     raise RuntimeError("Failed to save user message to database")
             except Exception as e:
-                logger.error(f"Failed to save message: {e}")
+                logger.error("Failed to save message: %s", e)
                 raise
             
             # Now save content blocks using the message's message_id (UUID string)
@@ -102,24 +119,24 @@ class MessageManagementService:
                     # Use message.message_id (UUID string FK) not message.id (integer PK)
                     await self.message_content_repo.add_content_blocks(message.message_id, blocks)
                 except Exception as e:
-                    logger.error(f"Failed to save content blocks for message {message.message_id}: {e}")
+                    logger.error("Failed to save content blocks for message %s: %s", message.message_id, e)
                     # Rollback: delete the message if content blocks fail
                     try:
                         await self.messages_repo.delete_message_by_id(thread_id, message_id)
-                        logger.warning(f"Rolled back message {message_id} after content block save failure")
+                        logger.warning("Rolled back message %s after content block save failure", message_id)
                     except Exception as rollback_error:
-                        logger.error(f"Failed to rollback message {message_id}: {rollback_error}")
+                        logger.error("Failed to rollback message %s: %s", message_id, rollback_error)
                     raise RuntimeError(f"Failed to save content blocks for user message: {e}")
             
             # Load blocks back into message for return value
             if blocks:
                 message.content = await self.message_content_repo.get_blocks_by_message_id(message_id)
             
-            logger.info(f"Successfully saved user message {message_id} to thread {thread_id}")
+            logger.info("Successfully saved user message %s to thread %s", message_id, thread_id)
             return message
             
         except Exception as e:
-            logger.error(f"Error saving user message to thread {thread_id}: {e}")
+            logger.error("Error saving user message to thread %s: %s", thread_id, e)
             raise
     
     async def save_assistant_message(
@@ -153,25 +170,7 @@ class MessageManagementService:
             if message_id is None:
                 message_id = str(uuid.uuid4())
             
-            # Normalize content: use content_blocks if provided (backward compat), otherwise use content
-            # If content is a string, convert it to a text block
-            if content_blocks is not None:
-                blocks = content_blocks
-            elif content is not None:
-                if isinstance(content, str) and content.strip():
-                    # Convert string content to a text block
-                    blocks = [{
-                        "id": f"text_{message_id or int(time.time() * 1000)}",
-                        "type": "text",
-                        "needsApproval": False,
-                        "data": {"text": content}
-                    }]
-                elif isinstance(content, list):
-                    blocks = content
-                else:
-                    blocks = []
-            else:
-                blocks = []
+            blocks = _normalize_blocks(content, content_blocks, message_id)
             
             message = ChatMessage(
                 thread_id=thread_id,
@@ -183,15 +182,16 @@ class MessageManagementService:
             
             if user_id:
                 logger.info(
-                    f"Saving assistant message {message_id} to thread {thread_id} "
-                    f"with user_id: {user_id}"
+                    "Saving assistant message %s to thread %s "
+                    "with user_id: %s",
+                    message_id, thread_id, user_id
                 )
             
             # Check if message already exists (upsert pattern)
             existing_message = await self.messages_repo.get_message_by_id(thread_id, message_id)
             
             if existing_message:
-                logger.info(f"Message {message_id} already exists, will update content blocks")
+                logger.info("Message %s already exists, will update content blocks", message_id)
                 message = existing_message
             else:
                 try:
@@ -199,39 +199,37 @@ class MessageManagementService:
                     if not success:
                         raise RuntimeError("Failed to save assistant message to database")
                 except Exception as e:
-                    logger.error(f"Failed to save message: {e}")
+                    logger.error("Failed to save message: %s", e)
                     raise
             
             
             if blocks:
                 try:
-                    # Delete old blocks first
-                    await self.message_content_repo.delete_blocks_by_message_id(message_id)
-                    for block in blocks:
-                        await self.message_content_repo.add_content_block_with_sequence(
-                            message_id, block
-                        )
+                    # Replace old blocks in one DELETE + bulk INSERT
+                    inserted = await self.message_content_repo.replace_content_blocks(
+                        message_id, blocks
+                    )
                     
-                    logger.info(f"Inserted {len(blocks)} content blocks with sequences for message {message_id}")
+                    logger.info("Inserted %s content blocks with sequences for message %s", inserted, message_id)
                 except Exception as e:
-                    logger.error(f"Failed to save content blocks for message {message.message_id}: {e}")
+                    logger.error("Failed to save content blocks for message %s: %s", message.message_id, e)
                     if not existing_message:
                         try:
                             await self.messages_repo.delete_message_by_id(thread_id, message_id)
-                            logger.warning(f"Rolled back message {message_id} after content block save failure")
+                            logger.warning("Rolled back message %s after content block save failure", message_id)
                         except Exception as rollback_error:
-                            logger.error(f"Failed to rollback message {message_id}: {rollback_error}")
+                            logger.error("Failed to rollback message %s: %s", message_id, rollback_error)
                     raise RuntimeError(f"Failed to save content blocks for assistant message: {e}")
             
             # Load blocks back into message for return value
             if blocks:
                 message.content = await self.message_content_repo.get_blocks_by_message_id(message_id)
             
-            logger.info(f"Successfully saved assistant message {message_id} to thread {thread_id}")
+            logger.info("Successfully saved assistant message %s to thread %s", message_id, thread_id)
             return message
             
         except Exception as e:
-            logger.error(f"Error saving assistant message to thread {thread_id}: {e}")
+            logger.error("Error saving assistant message to thread %s: %s", thread_id, e)
             raise
     
 
@@ -270,7 +268,7 @@ class MessageManagementService:
             
             return messages
         except Exception as e:
-            logger.error(f"Error retrieving messages for thread {thread_id}: {e}")
+            logger.error("Error retrieving messages for thread %s: %s", thread_id, e)
             raise
     
     async def _get_filtered_messages(
@@ -285,7 +283,10 @@ class MessageManagementService:
         Internal method for filtered message retrieval with optimized queries.
         Content blocks are loaded separately.
         """
-        # Build filter criteria for optimized database query
+        # Build filter criteria for optimized database query.
+        # Filters and ordering follow idx_chat_messages_thread_sender
+        # (thread_id, sender, timestamp) so the planner can seek on the prefix;
+        # keep them aligned if new filters are added.
         filter_criteria = {"thread_id": thread_id}
         
         if sender_filter:
@@ -302,7 +303,7 @@ class MessageManagementService:
             filter_criteria=filter_criteria,
             limit=limit,
             skip=skip,
-            order_by=[("timestamp", 1)]  # Chronological order
+            order_by=[asc(ChatMessage.timestamp)]  # Chronological order
         )
         
         # Load content blocks for each message
@@ -326,7 +327,7 @@ class MessageManagementService:
                 )
             return message
         except Exception as e:
-            logger.error(f"Error retrieving last message for thread {thread_id}: {e}")
+            logger.error("Error retrieving last message for thread %s: %s", thread_id, e)
             return None
     
     def _sanitize_content(self, content: Any) -> Any:
@@ -336,13 +337,12 @@ class MessageManagementService:
         """
         if isinstance(content, str):
             # Basic sanitization - remove null bytes and excessive whitespace
-            content = content.replace('\x00', '').strip()
+            content = content.translate(_NULL_BYTE_TABLE).strip()
             
             # Limit content length for security (10MB limit)
-            max_length = 10 * 1024 * 1024  # 10MB
-            if len(content) > max_length:
-                content = content[:max_length] + "... [truncated]"
-                logger.warning(f"Message content truncated to {max_length} characters")
+            if len(content) > MAX_CONTENT_LENGTH:
+                content = content[:MAX_CONTENT_LENGTH] + "... [truncated]"
+                logger.warning("Message content truncated to %s characters", MAX_CONTENT_LENGTH)
         
         return content
     
@@ -363,7 +363,7 @@ class MessageManagementService:
                 )
             return message
         except Exception as e:
-            logger.error(f"Error finding message {message_id} in thread {thread_id}: {e}")
+            logger.error("Error finding message %s in thread %s: %s", message_id, thread_id, e)
             return None
     
     async def validate_message_ownership(
@@ -376,12 +376,11 @@ class MessageManagementService:
         Validate that a message belongs to the expected sender for security.
         """
         try:
-            message = await self._get_message_by_id(thread_id, message_id)
-            if not message:
-                return False
-            return message.sender == expected_sender
+            return await self.messages_repo.exists(
+                thread_id, message_id, sender=expected_sender
+            )
         except Exception as e:
-            logger.error(f"Error validating message ownership: {e}")
+            logger.error("Error validating message ownership: %s", e)
             return False
     
     async def update_block_status(
@@ -396,69 +395,64 @@ class MessageManagementService:
         Only backend should control these for security.
         """
         try:
-            # Validate the message exists and belongs to the thread
-            message = await self.messages_repo.get_message_by_id(thread_id, message_id)
-            if not message:
+            # Validate the message exists in the thread and fetch the block's
+            # current state in one query, so no-op updates can skip the UPDATE
+            current = await self.message_content_repo.get_block_state(
+                thread_id, message_id, block_id
+            )
+            if current is None:
                 raise ValueError(f"Message {message_id} not found in thread {thread_id}")
             
-            # Filter valid status fields for blocks
-            valid_fields = {'needsApproval', 'messageStatus', 'message_status'}
-            
-            filtered_updates = {k: v for k, v in status_updates.items() if k in valid_fields}
+            # Filter valid status fields for blocks (single-field requests are the common case)
+            if len(status_updates) == 1:
+                (field, value), = status_updates.items()
+                filtered_updates = {field: value} if field in _BLOCK_STATUS_FIELDS else {}
+            else:
+                filtered_updates = {
+                    k: v for k, v in status_updates.items() if k in _BLOCK_STATUS_FIELDS
+                }
             
             if not filtered_updates:
                 logger.warning(
-                    f"No valid block status updates provided for block {block_id} "
-                    f"in message {message_id}"
+                    "No valid block status updates provided for block %s "
+                    "in message %s",
+                    block_id, message_id
                 )
                 return False
             
+            if not current:
+                logger.error("Block %s not found in message %s", block_id, message_id)
+                return False
+            
             # Update the block in message_content collection
-            success = await self.message_content_repo.update_block(block_id, filtered_updates)
+            success = await self.message_content_repo.update_block(
+                block_id, filtered_updates, current=current
+            )
             
             if success:
                 logger.info(
-                    f"Updated block {block_id} status in message {message_id}: {filtered_updates}"
+                    "Updated block %s status in message %s: %s", block_id, message_id, filtered_updates
                 )
             else:
-                logger.error(f"Failed to update block {block_id} status in message {message_id}")
+                logger.error("Failed to update block %s status in message %s", block_id, message_id)
             
             return success
             
         except Exception as e:
-            logger.error(f"Error updating block {block_id} status in message {message_id}: {e}")
+            logger.error("Error updating block %s status in message %s: %s", block_id, message_id, e)
             raise
     
     async def clear_previous_approvals(self, thread_id: str) -> None:
         try:
-         
-            filter_criteria = {
-                "thread_id": thread_id,
-                "sender": "assistant"
-            }
-            
-            # Get assistant messages
-            assistant_messages = await self.messages_repo.find_many(
-                filter_criteria=filter_criteria
-            )
+            # Single indexed lookup instead of loading every assistant message's blocks
+            block_ids = await self.message_content_repo.get_pending_plan_block_ids(thread_id)
             
-            # For each message, clear plan block approval flags
-            for msg in assistant_messages:
-                # Get content blocks for this message
-                blocks = await self.message_content_repo.get_blocks_by_message_id(
-                    msg.message_id
+            for block_id in block_ids:
+                await self.message_content_repo.update_block(
+                    block_id, 
+                    {'needs_approval': False}
                 )
-                
-                # Find plan blocks that need approval and clear them
-                for block in blocks:
-                    if block.get('type') == 'plan' and block.get('needsApproval'):
-                        block_id = block.get('id')
-                        if block_id:
-                            await self.message_content_repo.update_block(
-                                block_id, 
-                                {'needs_approval': False}
-                            )
-                            logger.info(f"Cleared needs_approval from plan block {block_id}")
+                logger.info("Cleared needs_approval from plan block %s", block_id)
                 
         except Exception as e:
-            logger.warning(f"Failed to clear previous approval flags: {e}")
+            logger.warning("Failed to clear previous approval flags: %s", e)
\ No newline at end of file
@@ -4,7 +4,11 @@ Profile Service for managing user profiles and custom instructions.
 
 import logging
 from typing import Dict, Any, Optional
+
+import httpx
+
 from app.core.config import settings
+from app.services.storage_service import PROFILE_COLUMNS
 
 logger = logging.getLogger(__name__)
 
@@ -13,20 +17,29 @@ class ProfileService:
     """Service for managing user profiles."""
     
     def __init__(self):
-        try:
-            from supabase import create_client, Client
-            
-            self.client: Client = create_client(
-                settings.supabase_url,
-                settings.supabase_service_role_key
-            )
-            
-            logger.info("Initialized ProfileService")
-        except ImportError:
-            logger.error("Supabase client not installed. Install with: pip install supabase")
-            raise
+        if not settings.supabase_url or not settings.supabase_service_role_key:
+            raise ValueError("Supabase URL and service role key must be configured")
+        
+        key = settings.supabase_service_role_key
+        
+        # Talk to PostgREST directly over a pooled async client so profile
+        # reads never block the event loop
+        self._client = httpx.AsyncClient(
+            base_url=f"{settings.supabase_url.rstrip('/')}/rest/v1",
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+            },
+            timeout=10.0,
+        )
+        
+        logger.info("Initialized ProfileService")
+    
+    async def close(self) -> None:
+        """Close the underlying HTTP client."""
+        await self._client.aclose()
     
-    def get_profile(self, user_id: str) -> Dict[str, Any]:
+    async def get_profile(self, user_id: str) -> Dict[str, Any]:
         """
         Get user profile.
         
@@ -43,21 +56,24 @@ class ProfileService:
         }
         """
         try:
-            response = self.client.table("profiles").select(
-                "id, name, email, nickname, role, about_user, custom_instructions, communication_style"
-            ).eq("id", user_id).single().execute()
+            # Single-object Accept header: 200 with one row, 406 when none match
+            response = await self._client.get(
+                "/profiles",
+                params={"id": f"eq.{user_id}", "select": PROFILE_COLUMNS},
+                headers={"Accept": "application/vnd.pgrst.object+json"},
+            )
             
-            if not response.data:
-                logger.warning(f"No profile found for user_id: {user_id}")
+            if response.status_code != 200:
+                logger.warning("No profile found for user_id: %s", user_id)
                 return {}
             
-            return response.data
+            return response.json()
             
         except Exception as e:
-            logger.error(f"Failed to fetch profile for {user_id}: {str(e)}")
+            logger.error("Failed to fetch profile for %s: %s", user_id, e)
             return {}
     
-    def update_profile(self, user_id: str, updates: Dict[str, Any]) -> bool:
+    async def update_profile(self, user_id: str, updates: Dict[str, Any]) -> bool:
         """
         Update user profile.
         
@@ -85,23 +101,30 @@ class ProfileService:
             # Validate communication_style
             if "communication_style" in safe_updates:
                 if safe_updates["communication_style"] not in ["concise", "detailed", "balanced"]:
-                    logger.warning(f"Invalid communication_style: {safe_updates['communication_style']}")
+                    logger.warning("Invalid communication_style: %s", safe_updates['communication_style'])
                     safe_updates.pop("communication_style")
             
             if not safe_updates:
-                logger.warning(f"No valid fields to update for user_id: {user_id}")
+                logger.warning("No valid fields to update for user_id: %s", user_id)
                 return False
             
-            response = self.client.table("profiles").update(safe_updates).eq("id", user_id).execute()
+            # Skip echoing the updated row back; the exact count tells us whether it matched
+            response = await self._client.patch(
+                "/profiles",
+                params={"id": f"eq.{user_id}"},
+                json=safe_updates,
+                headers={"Prefer": "return=minimal,count=exact"},
+            )
             
-            if not response.data:
-                logger.warning(f"Failed to update profile for user_id: {user_id}")
+            # Content-Range is "*/<rows updated>"
+            _, _, count = response.headers.get("Content-Range", "").rpartition("/")
+            if not response.is_success or not count.isdigit() or not int(count):
+                logger.warning("Failed to update profile for user_id: %s", user_id)
                 return False
             
-            logger.info(f"Successfully updated profile for user_id: {user_id}")
+            logger.info("Successfully updated profile for user_id: %s", user_id)
             return True
             
         except Exception as e:
-            logger.error(f"Error updating profile for {user_id}: {str(e)}")
+            logger.error("Error updating profile for %s: %s", user_id, e)
             return False
-
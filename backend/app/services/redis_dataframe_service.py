@@ -6,47 +6,202 @@ Handles serialization, deserialization, and lifecycle management of DataFrames i
 import pickle
 import uuid
 import logging
+import threading
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import pandas as pd
 import redis
+import redis.asyncio as aioredis
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+
+# Fire-and-forget writes are flushed once this many are buffered...
+WRITE_BATCH_SIZE = 128
+# ...or after this many seconds, whichever comes first
+WRITE_FLUSH_INTERVAL = 0.005
+
+# Process-wide connection pools (sync + asyncio) shared by every RedisDataFrameService instance.
+# redis-py picks the hiredis C parser automatically when it is installed.
+_connection_pool: Optional[redis.ConnectionPool] = None
+_async_connection_pool: Optional[aioredis.ConnectionPool] = None
+
+
+def _pool_kwargs() -> Dict[str, Any]:
+    """Connection options shared by the sync and async pools"""
+    kwargs = dict(
+        max_connections=settings.redis_max_connections,
+        decode_responses=False,  # We need bytes for pickle
+        socket_timeout=5.0,
+        socket_connect_timeout=5.0,
+        retry_on_timeout=True,
+        # Retry once on a dropped socket instead of failing the request
+        retry_on_error=[redis.ConnectionError, redis.TimeoutError],
+        # PING connections idle longer than this before reusing them
+        health_check_interval=30
+    )
+    if not settings.redis_url:
+        kwargs.update(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=settings.redis_db,
+            password=settings.redis_password if settings.redis_password else None
+        )
+    return kwargs
+
+
+def get_redis_connection_pool() -> redis.ConnectionPool:
+    """Get or create the shared Redis connection pool"""
+    global _connection_pool
+    
+    if _connection_pool is None:
+        if settings.redis_url:
+            _connection_pool = redis.ConnectionPool.from_url(settings.redis_url, **_pool_kwargs())
+        else:
+            _connection_pool = redis.ConnectionPool(**_pool_kwargs())
+    
+    return _connection_pool
+
+
+def get_async_redis_connection_pool() -> aioredis.ConnectionPool:
+    """Get or create the shared asyncio Redis connection pool"""
+    global _async_connection_pool
+    
+    if _async_connection_pool is None:
+        if settings.redis_url:
+            _async_connection_pool = aioredis.ConnectionPool.from_url(
+                settings.redis_url, **_pool_kwargs()
+            )
+        else:
+            _async_connection_pool = aioredis.ConnectionPool(**_pool_kwargs())
+    
+    return _async_connection_pool
+
+
+async def close_async_redis_connection_pool() -> None:
+    """Disconnect the shared asyncio pool (called on application shutdown)"""
+    global _async_connection_pool
+    
+    if _async_connection_pool is not None:
+        await _async_connection_pool.disconnect()
+        _async_connection_pool = None
+
+
+class _PipelinedWriter:
+    """
+    Background writer that coalesces fire-and-forget commands into pipelines.
+    
+    Producers only pay for an in-memory append; a daemon thread sends the
+    buffered commands in one non-transactional pipeline WRITE_FLUSH_INTERVAL
+    seconds after the first command of a batch is queued, or as soon as
+    WRITE_BATCH_SIZE are queued. While the buffer is empty the thread blocks
+    without waking.
+    """
+    
+    def __init__(self, client: redis.Redis):
+        self._client = client
+        self._buf: deque = deque()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # Set when the buffer goes from empty to non-empty
+        self._wakeup = threading.Event()
+        # Set when a batch should be sent without waiting out the interval
+        self._flush_now = threading.Event()
+        self._pending = 0
+        self._thread: Optional[threading.Thread] = None
+    
+    def submit(self, command: str, *args: Any) -> None:
+        """Queue a command without waiting for Redis to acknowledge it"""
+        with self._lock:
+            self._buf.append((command, args))
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="redis-pipelined-writer", daemon=True
+                )
+                self._thread.start()
+            if len(self._buf) == 1:
+                self._wakeup.set()
+            if len(self._buf) >= WRITE_BATCH_SIZE:
+                self._flush_now.set()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued command has been sent; False on timeout"""
+        self._flush_now.set()
+        self._wakeup.set()
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+    
+    def _run(self) -> None:
+        while True:
+            # Idle: sleep until the first command of the next batch arrives
+            self._wakeup.wait()
+            # Give producers WRITE_FLUSH_INTERVAL to fill the batch
+            self._flush_now.wait(WRITE_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self._flush_now.clear()
+            self._drain()
+    
+    def _drain(self) -> None:
+        with self._lock:
+            batch = list(self._buf)
+            self._buf.clear()
+        if not batch:
+            return
+        
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for command, args in batch:
+                getattr(pipe, command)(*args)
+            pipe.execute()
+        except Exception as e:
+            logger.error("Failed to flush %s pipelined Redis writes: %s", len(batch), e)
+        finally:
+            with self._lock:
+                self._pending -= len(batch)
+                if self._pending == 0:
+                    self._idle.notify_all()
+
+
 class RedisDataFrameService:
     """Service for managing pandas DataFrames in Redis with automatic cleanup and TTL"""
     
     def __init__(self):
         """Initialize Redis DataFrame service from settings"""
-        # Create Redis client from settings
-        if settings.redis_url:
-            self.redis = redis.from_url(
-                settings.redis_url,
-                decode_responses=False,  # We need bytes for pickle
-                socket_timeout=5.0,
-                socket_connect_timeout=5.0,
-                retry_on_timeout=True
-            )
-        else:
-            self.redis = redis.Redis(
-                host=settings.redis_host,
-                port=settings.redis_port,
-                db=settings.redis_db,
-                password=settings.redis_password if settings.redis_password else None,
-                decode_responses=False,  # We need bytes for pickle
-                socket_timeout=5.0,
-                socket_connect_timeout=5.0,
-                retry_on_timeout=True
-            )
+        # Reuse the shared pool so sockets are not re-established per instance
+        self.redis = redis.Redis(connection_pool=get_redis_connection_pool())
+        # Non-blocking client for request handlers running on the event loop
+        self.async_redis = aioredis.Redis(connection_pool=get_async_redis_connection_pool())
+        self._writer = _PipelinedWriter(self.redis)
         
         self.ttl = settings.redis_ttl
-        logger.info(f"Initialized RedisDataFrameService with TTL: {self.ttl}s")
+        logger.info("Initialized RedisDataFrameService with TTL: %ss", self.ttl)
     
     def _generate_key(self, prefix: str = "df") -> str:
         """Generate a unique Redis key for DataFrame storage"""
         return f"{prefix}:{uuid.uuid4().hex}"
     
+    def _build_context(
+        self,
+        df_id: str,
+        df: pd.DataFrame,
+        sql_query: Optional[str],
+        metadata: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Build the metadata context stored alongside a DataFrame"""
+        now = datetime.utcnow()
+        return {
+            "df_id": df_id,
+            "sql_query": sql_query,
+            "columns": df.columns.tolist(),
+            "shape": df.shape,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl),
+            "metadata": metadata or {}
+        }
+    
     def store_dataframe(
         self, 
         df: pd.DataFrame, 
@@ -57,51 +212,34 @@ class RedisDataFrameService:
             # Generate unique key
             df_id = self._generate_key()
             
-            # Serialize DataFrame using pickle
-            df_bytes = pickle.dumps(df)
-            
-            # Store DataFrame with TTL
-            self.redis.setex(df_id, self.ttl, df_bytes)
-            
-            # Create metadata
-            now = datetime.utcnow()
-            expires_at = now + timedelta(seconds=self.ttl)
+            # Store DataFrame (pickled) and its metadata with TTL in one round-trip;
+            # metadata is kept under a separate key for quick access
+            context = self._build_context(df_id, df, sql_query, metadata)
+            self.mset_with_ttl({
+                df_id: pickle.dumps(df),
+                f"{df_id}:meta": pickle.dumps(context)
+            })
             
-            context = {
-                "df_id": df_id,
-                "sql_query": sql_query,
-                "columns": df.columns.tolist(),
-                "shape": df.shape,
-                "created_at": now,
-                "expires_at": expires_at,
-                "metadata": metadata or {}
-            }
-            
-            # Store metadata separately for quick access
-            metadata_key = f"{df_id}:meta"
-            metadata_bytes = pickle.dumps(context)
-            self.redis.setex(metadata_key, self.ttl, metadata_bytes)
-            
-            logger.info(f"Stored DataFrame {df_id} with shape {df.shape}, expires at {expires_at}")
+            logger.info("Stored DataFrame %s with shape %s, expires at %s", df_id, df.shape, context['expires_at'])
             return context
             
         except Exception as e:
-            logger.error(f"Failed to store DataFrame: {str(e)}")
+            logger.error("Failed to store DataFrame: %s", e)
             raise RuntimeError(f"Failed to store DataFrame in Redis: {str(e)}")
     
     def get_dataframe(self, df_id: str) -> Optional[pd.DataFrame]:
         try:
             df_bytes = self.redis.get(df_id)
             if df_bytes is None:
-                logger.warning(f"DataFrame {df_id} not found or expired")
+                logger.warning("DataFrame %s not found or expired", df_id)
                 return None
             
             df = pickle.loads(df_bytes)
-            logger.info(f"Retrieved DataFrame {df_id} with shape {df.shape}")
+            logger.info("Retrieved DataFrame %s with shape %s", df_id, df.shape)
             return df
             
         except Exception as e:
-            logger.error(f"Failed to retrieve DataFrame {df_id}: {str(e)}")
+            logger.error("Failed to retrieve DataFrame %s: %s", df_id, e)
             return None
     
     def get_metadata(self, df_id: str) -> Optional[Dict[str, Any]]:
@@ -110,21 +248,21 @@ class RedisDataFrameService:
             metadata_key = f"{df_id}:meta"
             metadata_bytes = self.redis.get(metadata_key)
             if metadata_bytes is None:
-                logger.warning(f"Metadata for DataFrame {df_id} not found or expired")
+                logger.warning("Metadata for DataFrame %s not found or expired", df_id)
                 return None
             
             metadata = pickle.loads(metadata_bytes)
             return metadata
             
         except Exception as e:
-            logger.error(f"Failed to retrieve metadata for DataFrame {df_id}: {str(e)}")
+            logger.error("Failed to retrieve metadata for DataFrame %s: %s", df_id, e)
             return None
     
     def exists(self, df_id: str) -> bool:
         try:
             return self.redis.exists(df_id) > 0
         except Exception as e:
-            logger.error(f"Failed to check existence of DataFrame {df_id}: {str(e)}")
+            logger.error("Failed to check existence of DataFrame %s: %s", df_id, e)
             return False
     
     def delete_dataframe(self, df_id: str) -> bool:
@@ -135,14 +273,14 @@ class RedisDataFrameService:
             deleted_count = self.redis.delete(df_id, metadata_key)
             
             if deleted_count > 0:
-                logger.info(f"Deleted DataFrame {df_id} and metadata")
+                logger.info("Deleted DataFrame %s and metadata", df_id)
                 return True
             else:
-                logger.warning(f"DataFrame {df_id} was not found for deletion")
+                logger.warning("DataFrame %s was not found for deletion", df_id)
                 return False
                 
         except Exception as e:
-            logger.error(f"Failed to delete DataFrame {df_id}: {str(e)}")
+            logger.error("Failed to delete DataFrame %s: %s", df_id, e)
             return False
     
     def extend_ttl(self, df_id: str, additional_seconds: int = None) -> bool:
@@ -152,20 +290,37 @@ class RedisDataFrameService:
             metadata_key = f"{df_id}:meta"
             
             # Extend TTL for both DataFrame and metadata
-            df_result = self.redis.expire(df_id, ttl_seconds)
-            meta_result = self.redis.expire(metadata_key, ttl_seconds)
+            df_result, meta_result = self.pipeline_execute([
+                ("expire", (df_id, ttl_seconds)),
+                ("expire", (metadata_key, ttl_seconds))
+            ])
             
             if df_result and meta_result:
-                logger.info(f"Extended TTL for DataFrame {df_id} by {ttl_seconds}s")
+                logger.debug("Extended TTL for DataFrame %s by %ss", df_id, ttl_seconds)
                 return True
             else:
-                logger.warning(f"Failed to extend TTL for DataFrame {df_id}")
+                logger.warning("Failed to extend TTL for DataFrame %s", df_id)
                 return False
                 
         except Exception as e:
-            logger.error(f"Failed to extend TTL for DataFrame {df_id}: {str(e)}")
+            logger.error("Failed to extend TTL for DataFrame %s: %s", df_id, e)
             return False
     
+    def extend_ttl_nowait(self, df_id: str, additional_seconds: int = None) -> None:
+        """
+        Fire-and-forget variant of extend_ttl for callers that ignore the result.
+        
+        The EXPIREs are buffered and sent in a background pipeline; use flush()
+        when the TTL must be applied before continuing (e.g. in tests).
+        """
+        ttl_seconds = additional_seconds or self.ttl
+        self._writer.submit("expire", df_id, ttl_seconds)
+        self._writer.submit("expire", f"{df_id}:meta", ttl_seconds)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all fire-and-forget writes have been sent to Redis"""
+        return self._writer.flush(timeout)
+    
     def list_dataframes(self) -> List[Dict[str, Any]]:
         try:
             # Find all DataFrame keys
@@ -173,17 +328,15 @@ class RedisDataFrameService:
             # Filter out metadata keys
             df_keys = [key.decode() for key in df_keys if not key.decode().endswith(":meta")]
             
-            dataframes = []
-            for df_id in df_keys:
-                metadata = self.get_metadata(df_id)
-                if metadata:
-                    dataframes.append(metadata)
+            # Fetch all metadata entries in a single MGET
+            meta_values = self.mget([f"{df_id}:meta" for df_id in df_keys]) if df_keys else []
+            dataframes = [pickle.loads(value) for value in meta_values if value is not None]
             
-            logger.info(f"Found {len(dataframes)} stored DataFrames")
+            logger.info("Found %s stored DataFrames", len(dataframes))
             return dataframes
             
         except Exception as e:
-            logger.error(f"Failed to list DataFrames: {str(e)}")
+            logger.error("Failed to list DataFrames: %s", e)
             return []
     
     def cleanup_expired(self) -> int:
@@ -198,14 +351,45 @@ class RedisDataFrameService:
             
             cleaned_count = max(0, existing_count - active_count)
             if cleaned_count > 0:
-                logger.info(f"Redis TTL cleanup: {cleaned_count} DataFrames expired")
+                logger.info("Redis TTL cleanup: %s DataFrames expired", cleaned_count)
             
             return cleaned_count
             
         except Exception as e:
-            logger.error(f"Failed to check cleanup status: {str(e)}")
+            logger.error("Failed to check cleanup status: %s", e)
             return 0
     
+    # ==================== Batch API ====================
+    # Callers touching several keys should use these instead of looping over
+    # get/set/delete: one round-trip covers all commands.
+    
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Get several raw values in one round-trip (None for missing keys)"""
+        return self.redis.mget(keys)
+    
+    def mset_with_ttl(self, mapping: Dict[str, bytes], ttl: Optional[int] = None) -> List[Any]:
+        """Set several raw values with a TTL using one non-transactional pipeline"""
+        ttl = ttl or self.ttl
+        pipe = self.redis.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.setex(key, ttl, value)
+        return pipe.execute()
+    
+    def pipeline_execute(self, ops: List[Tuple[str, Tuple[Any, ...]]]) -> List[Any]:
+        """
+        Run arbitrary commands in one non-transactional pipeline.
+        
+        Args:
+            ops: (command name, args) pairs, e.g. [("expire", (key, 60))]
+            
+        Returns:
+            Command results in order
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for command, args in ops:
+            getattr(pipe, command)(*args)
+        return pipe.execute()
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get Redis DataFrame service statistics
         
@@ -236,9 +420,105 @@ class RedisDataFrameService:
             return stats
             
         except Exception as e:
-            logger.error(f"Failed to get stats: {str(e)}")
+            logger.error("Failed to get stats: %s", e)
             return {"error": str(e)}
 
+    # ==================== Async API ====================
+    # Counterparts of the methods above for FastAPI handlers, so Redis I/O
+    # does not block the event loop. Agent tools keep using the sync API.
+    
+    async def astore_dataframe(
+        self,
+        df: pd.DataFrame,
+        sql_query: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        try:
+            df_id = self._generate_key()
+            context = self._build_context(df_id, df, sql_query, metadata)
+            
+            pipe = self.async_redis.pipeline(transaction=False)
+            pipe.setex(df_id, self.ttl, pickle.dumps(df))
+            pipe.setex(f"{df_id}:meta", self.ttl, pickle.dumps(context))
+            await pipe.execute()
+            
+            logger.info("Stored DataFrame %s with shape %s, expires at %s", df_id, df.shape, context['expires_at'])
+            return context
+            
+        except Exception as e:
+            logger.error("Failed to store DataFrame: %s", e)
+            raise RuntimeError(f"Failed to store DataFrame in Redis: {str(e)}")
+    
+    async def aget_dataframe(self, df_id: str) -> Optional[pd.DataFrame]:
+        try:
+            df_bytes = await self.async_redis.get(df_id)
+            if df_bytes is None:
+                logger.warning("DataFrame %s not found or expired", df_id)
+                return None
+            
+            df = pickle.loads(df_bytes)
+            logger.info("Retrieved DataFrame %s with shape %s", df_id, df.shape)
+            return df
+            
+        except Exception as e:
+            logger.error("Failed to retrieve DataFrame %s: %s", df_id, e)
+            return None
+    
+    async def aget_metadata(self, df_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            metadata_bytes = await self.async_redis.get(f"{df_id}:meta")
+            if metadata_bytes is None:
+                logger.warning("Metadata for DataFrame %s not found or expired", df_id)
+                return None
+            
+            return pickle.loads(metadata_bytes)
+            
+        except Exception as e:
+            logger.error("Failed to retrieve metadata for DataFrame %s: %s", df_id, e)
+            return None
+    
+    async def aexists(self, df_id: str) -> bool:
+        try:
+            return await self.async_redis.exists(df_id) > 0
+        except Exception as e:
+            logger.error("Failed to check existence of DataFrame %s: %s", df_id, e)
+            return False
+    
+    async def adelete_dataframe(self, df_id: str) -> bool:
+        try:
+            deleted_count = await self.async_redis.delete(df_id, f"{df_id}:meta")
+            
+            if deleted_count > 0:
+                logger.info("Deleted DataFrame %s and metadata", df_id)
+                return True
+            
+            logger.warning("DataFrame %s was not found for deletion", df_id)
+            return False
+            
+        except Exception as e:
+            logger.error("Failed to delete DataFrame %s: %s", df_id, e)
+            return False
+    
+    async def aextend_ttl(self, df_id: str, additional_seconds: int = None) -> bool:
+        try:
+            ttl_seconds = additional_seconds or self.ttl
+            
+            pipe = self.async_redis.pipeline(transaction=False)
+            pipe.expire(df_id, ttl_seconds)
+            pipe.expire(f"{df_id}:meta", ttl_seconds)
+            df_result, meta_result = await pipe.execute()
+            
+            if df_result and meta_result:
+                logger.debug("Extended TTL for DataFrame %s by %ss", df_id, ttl_seconds)
+                return True
+            
+            logger.warning("Failed to extend TTL for DataFrame %s", df_id)
+            return False
+            
+        except Exception as e:
+            logger.error("Failed to extend TTL for DataFrame %s: %s", df_id, e)
+            return False
+
 
 # Global instance
 _redis_df_service: Optional[RedisDataFrameService] = None
@@ -3,50 +3,235 @@ Supabase Storage Service for uploading plot images.
 Handles secure file uploads with proper content-type handling and public URL generation.
 """
 
+import base64
+import inspect
 import os
-import uuid
-from datetime import datetime
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
 import logging
 
+import httpx
+
 logger = logging.getLogger(__name__)
 
+# Payloads above this size go through the resumable (TUS) endpoint
+RESUMABLE_THRESHOLD = 6 * 1024 * 1024
+# Supabase requires every resumable chunk except the last to be exactly 6 MiB
+RESUMABLE_CHUNK_SIZE = 6 * 1024 * 1024
+RESUMABLE_MAX_RETRIES = 3
+# Images smaller than this are uploaded as-is; recompressing them is not worth the CPU
+COMPRESS_MIN_BYTES = 256 * 1024
+# Object paths are unique per upload, so the CDN may cache them for a year
+CACHE_CONTROL = "31536000"
+
+# Columns returned for profile reads; shared with ProfileService (keep in sync with ProfileResponse)
+PROFILE_COLUMNS = "id,name,email,nickname,role,about_user,custom_instructions,communication_style"
+# Storage-side profile reads also return the preference columns PROFILE_UPDATE_FIELDS can write
+USER_PROFILE_COLUMNS = f"{PROFILE_COLUMNS},preferences,llm_provider,llm_model"
+
+# Profile fields callers are allowed to update
+PROFILE_UPDATE_FIELDS = frozenset({
+    "nickname",
+    "role",
+    "about_user",
+    "custom_instructions",
+    "communication_style",
+    "preferences",
+    "llm_provider",
+    "llm_model",
+})
+COMMUNICATION_STYLES = frozenset({"concise", "detailed", "balanced"})
+
+# One Supabase client per (url, key), shared by every service in the process
+_CLIENT_CACHE: Dict[Tuple[str, str], Any] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+def get_supabase_client(supabase_url: str, supabase_key: str):
+    """
+    Return a shared Supabase client for the given credentials.
+    
+    Creating a client builds its own HTTP sessions and auth state, so services
+    reuse one instance instead of calling create_client themselves.
+    """
+    cache_key = (supabase_url, supabase_key)
+    client = _CLIENT_CACHE.get(cache_key)
+    if client is not None:
+        return client
+    
+    from supabase import create_client
+    from supabase.lib.client_options import ClientOptions
+    
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get(cache_key)
+        if client is None:
+            client = create_client(
+                supabase_url,
+                supabase_key,
+                options=ClientOptions(
+                    postgrest_client_timeout=10,
+                    storage_client_timeout=30
+                )
+            )
+            _CLIENT_CACHE[cache_key] = client
+    return client
+
 
 class SupabaseStorageService:
     
+    # Transport for the resumable-upload HTTP client; None uses httpx's default
+    _transport: Optional[httpx.BaseTransport] = None
+    
     def __init__(self, supabase_url: str, supabase_service_role_key: str):
         if not supabase_url or not supabase_service_role_key:
             raise ValueError("Supabase URL and service role key must be configured")
         
         try:
-            from supabase import create_client, Client
+            from supabase import Client
             
-            self.client: Client = create_client(
+            self.client: Client = get_supabase_client(
                 supabase_url,
                 supabase_service_role_key
             )
             self.bucket_name = "plot-images"  # Dedicated bucket for plot images
+            self._resumable_url = f"{supabase_url.rstrip('/')}/storage/v1/upload/resumable"
+            self._service_role_key = supabase_service_role_key
+            
+            # Bucket handle reused by every upload/delete call
+            self._bucket = self.client.storage.from_(self.bucket_name)
             
-            logger.info(f"Initialized Supabase storage service for bucket: {self.bucket_name}")
+            # Older storage3 releases take upsert via file_options, newer ones as a keyword
+            self._supports_upsert_kw = "upsert" in inspect.signature(self._bucket.upload).parameters
+            
+            logger.info("Initialized Supabase storage service for bucket: %s", self.bucket_name)
         except ImportError:
             logger.error("Supabase client not installed. Install with: pip install supabase")
             raise
     
     def _generate_file_path(self, filename: str) -> str:
         # Extract extension
-        extension = filename.split('.')[-1] if '.' in filename else 'png'
+        _, dot, extension = filename.rpartition('.')
+        if not dot:
+            extension = 'png'
         
-        # Generate unique filename with timestamp and UUID
-        timestamp = datetime.now().strftime("%Y%m%d")
-        unique_id = str(uuid.uuid4())[:8]
+        # Generate unique filename with UTC date and 32 random bits
+        timestamp = time.strftime("%Y%m%d", time.gmtime())
+        unique_id = os.urandom(4).hex()
         
         return f"plots/{timestamp}/{unique_id}.{extension}"
     
+    def _upload_resumable(
+        self,
+        file_path: str,
+        image_data: bytes,
+        content_type: str,
+        cache_control: str,
+        chunk_size: int = RESUMABLE_CHUNK_SIZE,
+    ) -> None:
+        """
+        Upload a large payload through the Supabase TUS endpoint.
+        
+        A failed chunk is retried on its own after re-reading the server
+        offset, so a dropped connection does not restart the whole upload.
+        """
+        def _b64(value: str) -> str:
+            return base64.b64encode(value.encode()).decode()
+        
+        metadata = ",".join(
+            f"{name} {_b64(value)}"
+            for name, value in (
+                ("bucketName", self.bucket_name),
+                ("objectName", file_path),
+                ("contentType", content_type),
+                ("cacheControl", cache_control),
+            )
+        )
+        total = len(image_data)
+        view = memoryview(image_data)
+        
+        with httpx.Client(
+            headers={
+                "Authorization": f"Bearer {self._service_role_key}",
+                "Tus-Resumable": "1.0.0",
+            },
+            timeout=30,
+            transport=self._transport,
+        ) as http:
+            response = http.post(
+                self._resumable_url,
+                headers={
+                    "Upload-Length": str(total),
+                    "Upload-Metadata": metadata,
+                    "x-upsert": "false",
+                },
+            )
+            response.raise_for_status()
+            upload_url = response.headers["Location"]
+            
+            offset = 0
+            retries = 0
+            while offset < total:
+                chunk = view[offset:offset + chunk_size]
+                try:
+                    response = http.patch(
+                        upload_url,
+                        content=bytes(chunk),
+                        headers={
+                            "Upload-Offset": str(offset),
+                            "Content-Type": "application/offset+octet-stream",
+                        },
+                    )
+                    response.raise_for_status()
+                    offset = int(response.headers["Upload-Offset"])
+                    retries = 0
+                except httpx.HTTPError as e:
+                    retries += 1
+                    if retries > RESUMABLE_MAX_RETRIES:
+                        raise
+                    logger.warning(
+                        "Resumable chunk at offset %d failed (attempt %d): %s",
+                        offset, retries, e,
+                    )
+                    # Resume from whatever the server has already persisted
+                    head = http.head(upload_url)
+                    head.raise_for_status()
+                    offset = int(head.headers["Upload-Offset"])
+    
+    def _compress_image(self, image_data: bytes, content_type: str) -> bytes:
+        """
+        Losslessly re-encode a PNG with maximum zlib effort.
+        
+        Returns the original bytes when Pillow is unavailable, the payload is
+        not a PNG, or the re-encoded image is not smaller.
+        """
+        if content_type != "image/png" or len(image_data) < COMPRESS_MIN_BYTES:
+            return image_data
+        
+        try:
+            from io import BytesIO
+            from PIL import Image
+            
+            with Image.open(BytesIO(image_data)) as img:
+                buffer = BytesIO()
+                img.save(buffer, format="PNG", optimize=True, compress_level=9)
+            compressed = buffer.getvalue()
+        except Exception as e:
+            logger.warning("Skipping plot image compression: %s", e)
+            return image_data
+        
+        if len(compressed) >= len(image_data):
+            return image_data
+        
+        logger.debug("Compressed plot image from %d to %d bytes", len(image_data), len(compressed))
+        return compressed
+    
     def upload_plot_image(
         self, 
         image_data: bytes, 
         filename: str = "plot.png",
-        content_type: str = "image/png"
+        content_type: str = "image/png",
+        compress: bool = True
     ) -> str:
     
         try:
@@ -57,61 +242,57 @@ class SupabaseStorageService:
             if not isinstance(image_data, bytes):
                 image_data = bytes(image_data)
             
-            # Upload with proper file options
-            try:
-                # Try with upsert as separate parameter (newer API)
-                response = self.client.storage.from_(self.bucket_name).upload(
-                    file_path,
-                    image_data,
-                    file_options={
-                        "content-type": content_type,
-                        "cache-control": "3600"  # Cache for 1 hour
-                    },
-                    upsert=False
-                )
-            except TypeError:
-                # Fallback: try without upsert parameter (older API)
-                response = self.client.storage.from_(self.bucket_name).upload(
+            if compress:
+                image_data = self._compress_image(image_data, content_type)
+            
+            if len(image_data) > RESUMABLE_THRESHOLD:
+                self._upload_resumable(file_path, image_data, content_type, CACHE_CONTROL)
+            else:
+                # Upload with proper file options
+                file_options = {
+                    "content-type": content_type,
+                    "cache-control": CACHE_CONTROL
+                }
+                upload_kwargs = {"upsert": False} if self._supports_upsert_kw else {}
+                response = self._bucket.upload(
                     file_path,
                     image_data,
-                    file_options={
-                        "content-type": content_type,
-                        "cache-control": "3600"  # Cache for 1 hour
-                    }
+                    file_options=file_options,
+                    **upload_kwargs
                 )
             
-            # Check for upload errors
-            if isinstance(response, dict) and response.get("error"):
-                raise Exception(f"Upload failed: {response.get('error')}")
-            elif hasattr(response, 'error') and response.error:
-                raise Exception(f"Upload failed: {response.error}")
+                # Check for upload errors
+                if isinstance(response, dict) and response.get("error"):
+                    raise Exception(f"Upload failed: {response.get('error')}")
+                elif hasattr(response, 'error') and response.error:
+                    raise Exception(f"Upload failed: {response.error}")
             
             # Get public URL
-            public_url = self.client.storage.from_(self.bucket_name).get_public_url(file_path)
+            public_url = self._bucket.get_public_url(file_path)
             
             if not public_url or (isinstance(public_url, str) and not public_url.strip()):
                 raise Exception("Failed to generate public URL")
             
-            logger.info(f"Successfully uploaded plot image: {file_path}")
+            logger.info("Successfully uploaded plot image: %s", file_path)
             return public_url
             
         except Exception as e:
-            logger.error(f"Failed to upload plot image: {str(e)}")
+            logger.error("Failed to upload plot image: %s", e)
             raise Exception(f"Image upload failed: {str(e)}")
     
     def delete_plot_image(self, file_path: str) -> bool:
         try:
-            response = self.client.storage.from_(self.bucket_name).remove([file_path])
+            response = self._bucket.remove([file_path])
             
             if hasattr(response, 'error') and response.error:
-                logger.error(f"Failed to delete file {file_path}: {response.error}")
+                logger.error("Failed to delete file %s: %s", file_path, response.error)
                 return False
             
-            logger.info(f"Successfully deleted plot image: {file_path}")
+            logger.info("Successfully deleted plot image: %s", file_path)
             return True
             
         except Exception as e:
-            logger.error(f"Error deleting file {file_path}: {str(e)}")
+            logger.error("Error deleting file %s: %s", file_path, e)
             return False
 
     # ==================== User Profile Management ====================
@@ -123,73 +304,37 @@ class SupabaseStorageService:
         try:
             # Select specific columns to ensure we get what we expect
             response = self.client.table("profiles").select(
-                "id, name, email, nickname, role, about_user, custom_instructions, communication_style"
+                USER_PROFILE_COLUMNS
             ).eq("id", user_id).single().execute()
             
             if not response.data:
-                logger.warning(f"No profile found for user_id: {user_id}")
+                logger.warning("No profile found for user_id: %s", user_id)
                 return {}
                 
             return response.data
             
         except Exception as e:
-            logger.error(f"Failed to fetch user profile for {user_id}: {str(e)}")
+            logger.error("Failed to fetch user profile for %s: %s", user_id, e)
             return {}
 
-    def update_user_profile(self, user_id: str, updates: Dict[str, Any]) -> bool:
-        """
-        Update user profile in Supabase.
-        """
-        try:
-            # Whitelist allowed update fields
-            allowed_fields = [
-                "nickname", 
-                "role", 
-                "about_user", 
-                "custom_instructions", 
-                "communication_style"
-            ]
-            
-            safe_updates = {k: v for k, v in updates.items() if k in allowed_fields}
-            
-            if "communication_style" in safe_updates:
-                if safe_updates["communication_style"] not in ["concise", "detailed", "balanced"]:
-                    safe_updates.pop("communication_style") # Ignore invalid values
-            
-            if not safe_updates:
-                logger.warning(f"No valid fields to update for user_id: {user_id}")
-                return False
-                
-            response = self.client.table("profiles").update(safe_updates).eq("id", user_id).execute()
-            
-            if not response.data:
-                logger.warning(f"Failed to update profile for user_id: {user_id}")
-                return False
-                
-            logger.info(f"Successfully updated profile for user_id: {user_id}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error updating user profile for {user_id}: {str(e)}")
-            return False
-
-    # ==================== User Profile Management ====================
-
-    def get_user_profile(self, user_id: str) -> Dict[str, Any]:
+    def get_user_profiles(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """
-        Fetch user profile and preferences from Supabase.
+        Fetch several user profiles in a single request.
+        
+        Returns a mapping of user_id to profile row; missing users are omitted.
         """
+        if not user_ids:
+            return {}
+        
         try:
-            response = self.client.table("profiles").select("*").eq("id", user_id).single().execute()
+            response = self.client.table("profiles").select(
+                USER_PROFILE_COLUMNS
+            ).in_("id", list(user_ids)).execute()
             
-            if not response.data:
-                logger.warning(f"No profile found for user_id: {user_id}")
-                return {}
-                
-            return response.data
+            return {row["id"]: row for row in (response.data or [])}
             
         except Exception as e:
-            logger.error(f"Failed to fetch user profile for {user_id}: {str(e)}")
+            logger.error("Failed to fetch user profiles for %s users: %s", len(user_ids), e)
             return {}
 
     def update_user_profile(self, user_id: str, updates: Dict[str, Any]) -> bool:
@@ -197,23 +342,33 @@ class SupabaseStorageService:
         Update user profile in Supabase.
         """
         try:
-            # We only allow updating specific fields to prevent overwriting critical data
-            allowed_fields = ["preferences", "communication_style", "llm_provider", "llm_model"]
-            safe_updates = {k: v for k, v in updates.items() if k in allowed_fields}
+            # Whitelist allowed update fields
+            safe_updates = {k: updates[k] for k in updates.keys() & PROFILE_UPDATE_FIELDS}
+            
+            if "communication_style" in safe_updates:
+                if safe_updates["communication_style"] not in COMMUNICATION_STYLES:
+                    safe_updates.pop("communication_style") # Ignore invalid values
             
             if not safe_updates:
-                logger.warning(f"No valid fields to update for user_id: {user_id}")
+                logger.warning("No valid fields to update for user_id: %s", user_id)
                 return False
                 
-            response = self.client.table("profiles").update(safe_updates).eq("id", user_id).execute()
+            from postgrest.types import CountMethod, ReturnMethod
             
-            if not response.data:
-                logger.warning(f"Failed to update profile for user_id: {user_id}")
+            # Skip echoing the updated row back; the exact count tells us whether it matched
+            response = self.client.table("profiles").update(
+                safe_updates,
+                count=CountMethod.exact,
+                returning=ReturnMethod.minimal
+            ).eq("id", user_id).execute()
+            
+            if not response.count:
+                logger.warning("Failed to update profile for user_id: %s", user_id)
                 return False
                 
-            logger.info(f"Successfully updated profile for user_id: {user_id}")
+            logger.info("Successfully updated profile for user_id: %s", user_id)
             return True
             
         except Exception as e:
-            logger.error(f"Error updating user profile for {user_id}: {str(e)}")
+            logger.error("Error updating user profile for %s: %s", user_id, e)
             return False
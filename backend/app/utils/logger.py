@@ -1,6 +1,8 @@
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from typing import Optional
 
 from app.core.config import settings
@@ -12,51 +14,95 @@ class LoggerManager:
     _configured = False
     _level = logging.INFO
     _handlers: list[logging.Handler] = []
+    _listener: Optional[QueueListener] = None
+    _queue_handler: Optional[QueueHandler] = None
+    _configure_lock = threading.Lock()
 
     @classmethod
     def configure(cls, level: Optional[str] = None, logs_dir: Optional[str] = None) -> None:
         """
         Configure root logging once with console + rotating file handlers.
 
+        The handlers run on a background QueueListener; the root logger only
+        enqueues records, so callers never block on console or disk I/O.
+
         Args:
             level: Override log level (e.g., "DEBUG"). Defaults to settings.log_level.
             logs_dir: Override logs directory. Defaults to settings.logs_dir.
         """
+        # Fast path without the lock once configured
         if cls._configured:
             return
 
-        log_level_str = (level or settings.log_level).upper()
-        cls._level = getattr(logging, log_level_str, logging.INFO)
+        with cls._configure_lock:
+            if cls._configured:
+                return
+
+            log_level_str = (level or settings.log_level).upper()
+            cls._level = getattr(logging, log_level_str, logging.INFO)
+
+            log_directory = logs_dir or settings.logs_dir
+            os.makedirs(log_directory, exist_ok=True)
+
+            formatter = logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            )
+
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(cls._level)
+            console_handler.setFormatter(formatter)
 
-        log_directory = logs_dir or settings.logs_dir
-        os.makedirs(log_directory, exist_ok=True)
+            file_path = os.path.join(log_directory, "app.log")
+            file_handler = TimedRotatingFileHandler(
+                file_path,
+                when="midnight",
+                backupCount=settings.log_retention_days,
+                encoding="utf-8",
+            )
+            file_handler.setLevel(cls._level)
+            file_handler.setFormatter(formatter)
 
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
+            cls._handlers = [console_handler, file_handler]
 
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(cls._level)
-        console_handler.setFormatter(formatter)
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            cls._listener = QueueListener(
+                log_queue, *cls._handlers, respect_handler_level=True
+            )
+            cls._listener.start()
+
+            root_logger = logging.getLogger()
+            root_logger.setLevel(cls._level)
+            cls._queue_handler = QueueHandler(log_queue)
+            root_logger.addHandler(cls._queue_handler)
+
+            cls._configured = True
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Flush queued records, stop the background listener and detach handlers.
 
-        file_path = os.path.join(log_directory, "app.log")
-        file_handler = TimedRotatingFileHandler(
-            file_path,
-            when="midnight",
-            backupCount=settings.log_retention_days,
-            encoding="utf-8",
-        )
-        file_handler.setLevel(cls._level)
-        file_handler.setFormatter(formatter)
+        Leaves logging unconfigured so a later configure() (e.g. a second app
+        lifespan in the same process) installs fresh handlers.
+        """
+        with cls._configure_lock:
+            if not cls._configured:
+                return
 
-        cls._handlers = [console_handler, file_handler]
+            # Detach first so nothing is enqueued after the listener drains
+            if cls._queue_handler is not None:
+                logging.getLogger().removeHandler(cls._queue_handler)
+                cls._queue_handler.close()
+                cls._queue_handler = None
 
-        root_logger = logging.getLogger()
-        root_logger.setLevel(cls._level)
-        for handler in cls._handlers:
-            root_logger.addHandler(handler)
+            if cls._listener is not None:
+                cls._listener.stop()
+                cls._listener = None
 
-        cls._configured = True
+            for handler in cls._handlers:
+                handler.close()
+            cls._handlers = []
+            cls._configured = False
 
     @classmethod
     def get_logger(cls, name: str, level: Optional[str] = None) -> logging.Logger:
@@ -73,10 +119,3 @@ class LoggerManager:
 def get_logger(name: str, level: Optional[str] = None) -> logging.Logger:
     """Convenience wrapper to fetch a configured logger."""
     return LoggerManager.get_logger(name, level)
-
-
-
-
-
-
-
@@ -0,0 +1,148 @@
+"""Utility functions for serializing pandas/numpy data to JSON."""
+
+import datetime
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# orjson handles numpy arrays/scalars natively with OPT_SERIALIZE_NUMPY, so
+# numpy_json_encoder is only reached for the leftovers (pandas types, etc.)
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _encode_float(obj: Any) -> Any:
+    value = float(obj)
+    return None if value != value else value  # NaN -> null
+
+
+def _encode_timestamp(obj: Any) -> Any:
+    return None if pd.isna(obj) else obj.isoformat()
+
+
+# Exact-type dispatch table: one dict lookup instead of an isinstance cascade
+_ENCODERS: Dict[type, Callable[[Any], Any]] = {
+    np.int8: int,
+    np.int16: int,
+    np.int32: int,
+    np.int64: int,
+    np.uint8: int,
+    np.uint16: int,
+    np.uint32: int,
+    np.uint64: int,
+    np.float16: _encode_float,
+    np.float32: _encode_float,
+    np.float64: _encode_float,
+    np.bool_: bool,
+    np.ndarray: np.ndarray.tolist,
+    pd.Timestamp: _encode_timestamp,
+    pd.Timedelta: str,
+    type(pd.NaT): lambda _: None,
+    type(pd.NA): lambda _: None,
+    datetime.date: lambda d: d.isoformat(),
+    datetime.datetime: lambda d: d.isoformat(),
+    datetime.time: lambda t: t.isoformat(),
+    set: list,
+    frozenset: list,
+    tuple: list,
+}
+
+
+def _slow_path(obj: Any) -> Any:
+    """Fallback for subclasses and types missing from the dispatch table."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return _encode_float(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def numpy_json_encoder(obj: Any) -> Any:
+    """
+    JSON ``default`` hook converting numpy/pandas objects to plain Python.
+    
+    Args:
+        obj: Object the JSON encoder could not serialize
+        
+    Returns:
+        A JSON-serializable equivalent (falls back to ``str(obj)``)
+    """
+    fn = _ENCODERS.get(type(obj))
+    return fn(obj) if fn is not None else _slow_path(obj)
+
+
+def safe_json_dumps(obj: Any) -> str:
+    """
+    Serialize data that may contain numpy/pandas values to a JSON string.
+    
+    Args:
+        obj: Data to serialize
+        
+    Returns:
+        JSON string
+    """
+    return orjson.dumps(obj, default=numpy_json_encoder, option=_ORJSON_OPTIONS).decode()
+
+
+
+def _arrow_round_trips(df: pd.DataFrame, table: pa.Table) -> bool:
+    """
+    Whether Arrow's records are identical to pandas' for this frame.
+    
+    Arrow merges dicts in an object column into one struct (filling missing
+    keys with None), rescales decimals to a common scale and stringifies
+    non-string column labels; those frames take the pandas path instead.
+    """
+    if not all(type(col) is str for col in df.columns):
+        return False
+    return not any(
+        pa.types.is_nested(field.type) or pa.types.is_decimal(field.type)
+        for field in table.schema
+    )
+
+
+def _pandas_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    # Cast first so NaN/NaT in numeric and datetime columns really become None
+    return df.astype(object).where(pd.notnull(df), None).to_dict(orient="records")
+
+
+def serialize_dataframe(df: pd.DataFrame, max_rows: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Convert a DataFrame into JSON-ready row records.
+    
+    Flat frames are boxed by Arrow in C rather than row-by-row in Python;
+    frames Arrow cannot represent losslessly use pandas' ``to_dict``. Either
+    way NaN/NaT become None.
+    
+    Args:
+        df: DataFrame to serialize
+        max_rows: Optional number of leading rows to keep
+        
+    Returns:
+        List of row dictionaries
+    """
+    if max_rows is not None:
+        df = df.head(max_rows)
+    
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError) as e:
+        # Mixed object columns, duplicate column names, etc.
+        logger.debug("Falling back to pandas records serialization: %s", e)
+        return _pandas_records(df)
+    
+    if not _arrow_round_trips(df, table):
+        return _pandas_records(df)
+    return table.to_pylist()
+
+
+__all__ = ["numpy_json_encoder", "safe_json_dumps", "serialize_dataframe"]
@@ -1,9 +1,11 @@
 """Utility functions for visualization data processing."""
 
-import json
 import logging
+from itertools import islice
 from typing import List, Dict, Any
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,25 +26,38 @@ def normalize_visualizations(visualizations: Any) -> List[Dict[str, Any]]:
         normalized: List[Dict[str, Any]] = []
         
         for v in visualizations:
-            if isinstance(v, str):
+            t = type(v)
+            # Exact type checks first: dicts and JSON strings are the common case
+            if t is dict:
+                normalized.append(v)
+            elif t is str or isinstance(v, str):
                 try:
-                    parsed = json.loads(v)
-                    if isinstance(parsed, dict):
-                        normalized.append(parsed)
-                except Exception as e:
-                    logger.warning(f"Failed to parse visualization JSON string: {e}")
+                    parsed = orjson.loads(v)
+                except orjson.JSONDecodeError as e:
+                    logger.warning("Failed to parse visualization JSON string: %s", e)
                     continue
+                if type(parsed) is dict:
+                    normalized.append(parsed)
             elif isinstance(v, dict):
                 normalized.append(v)
             else:
-                logger.warning(f"Unexpected visualization type: {type(v)}")
+                logger.warning("Unexpected visualization type: %s", t)
         
         return normalized
     except Exception as e:
-        logger.error(f"Error normalizing visualizations: {e}")
+        logger.error("Error normalizing visualizations: %s", e)
         return []
 
 
+def _preview_entry(viz: Dict[str, Any]) -> Dict[str, Any]:
+    data = viz.get("data")
+    return {
+        "type": viz.get("type", "unknown"),
+        "title": viz.get("title", "Untitled"),
+        "data_points": len(data) if isinstance(data, list) else 0
+    }
+
+
 def get_visualization_summary(visualizations: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Get a summary of visualization data.
@@ -61,26 +76,21 @@ def get_visualization_summary(visualizations: List[Dict[str, Any]]) -> Dict[str,
                 "visualization_types": []
             }
         
-        # Calculate summary statistics
-        viz_types = [viz.get("type", "unknown") for viz in visualizations]
-        unique_types = list(set(viz_types))
+        # Single ordered pass over the types; dict keys keep first-seen order
+        unique_types = list(dict.fromkeys(viz.get("type", "unknown") for viz in visualizations))
         
         return {
             "visualization_count": len(visualizations),
             "has_visualizations": True,
             "visualization_types": unique_types,
             "visualizations_preview": [
-                {
-                    "type": viz.get("type", "unknown"),
-                    "title": viz.get("title", "Untitled"),
-                    "data_points": len(viz.get("data", [])) if isinstance(viz.get("data"), list) else 0
-                }
-                for viz in visualizations[:3]  # First 3 visualizations as preview
+                _preview_entry(viz)
+                for viz in islice(visualizations, 3)  # First 3 visualizations as preview
             ]
         }
         
     except Exception as e:
-        logger.error(f"Error creating visualization summary: {e}")
+        logger.error("Error creating visualization summary: %s", e)
         return {
             "visualization_count": 0,
             "has_visualizations": False,
@@ -11,6 +11,7 @@ from app.core.database import db_manager
 from app.core.checkpointer import initialize_checkpointer, checkpointer_manager
 from app.agents import MainAgent
 from app.services.agent_service import AgentService
+from app.services.dependencies import shutdown_services
 from app.utils.logger import LoggerManager, get_logger
 
 
@@ -65,7 +66,9 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Agent Backend API...")
     await agent_service.shutdown()
+    await shutdown_services()
     await db_manager.close()
+    LoggerManager.shutdown()
 
 
 app = FastAPI(
@@ -0,0 +1,104 @@
+import pytest
+from unittest.mock import MagicMock
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="run tests marked slow (e.g. ones that load the real VQA model)",
+    )
+    parser.addoption(
+        "--run-integration",
+        action="store_true",
+        default=False,
+        help="run tests marked integration",
+    )
+    parser.addoption(
+        "--run-perf",
+        action="store_true",
+        default=False,
+        help="run wall-clock performance tests marked perf",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # marker -> option that opts it back in
+    gated = {"slow": "--run-slow", "integration": "--run-integration", "perf": "--run-perf"}
+    skips = {
+        marker: pytest.mark.skip(reason=f"need {option} option to run")
+        for marker, option in gated.items()
+        if not config.getoption(option)
+    }
+    if not skips:
+        return
+
+    for item in items:
+        for marker, skip in skips.items():
+            if marker in item.keywords:
+                item.add_marker(skip)
+                break
+
+
+# Load the VQA model once for the whole test run and share it across modules
+@pytest.fixture(scope="session")
+def vqa_tester():
+    import torch
+    from app.agents.tools.custom_toolkit import VisualQA
+
+    vqa = VisualQA()
+    vqa.model.eval()
+
+    # Run every call without autograd bookkeeping
+    answer_questions = vqa.answer_questions
+
+    def answer_questions_inference(*args, **kwargs):
+        with torch.inference_mode():
+            return answer_questions(*args, **kwargs)
+
+    vqa.answer_questions = answer_questions_inference
+    yield vqa
+    del vqa.answer_questions
+
+
+# VisualQA API double for tests of VQA consumers (e.g. ImageQATool)
+@pytest.fixture
+def vqa_mock():
+    from app.agents.tools.custom_toolkit import VisualQA
+
+    mock = MagicMock(spec=VisualQA)
+    mock.answer_questions.side_effect = lambda image_paths, query, batch_size=10: ["x"] * len(image_paths)
+    return mock
+
+
+def _make_vqa_stub(image_processor=None, generate=None):
+    """Real VisualQA batching loop wired to a fake processor/model; no weights load."""
+    from app.agents.tools.custom_toolkit import VisualQA
+
+    # Bypass __new__/__init__ so no weights are loaded
+    vqa = object.__new__(VisualQA)
+    vqa.processor = MagicMock()
+    vqa.processor.image_processor.side_effect = image_processor or (
+        lambda images, **kw: {"pixel_values": len(images)}
+    )
+    vqa.processor.tokenizer.side_effect = lambda text, **kw: {"n": len(text)}
+    vqa.processor.batch_decode.side_effect = lambda outputs, **kw: ["x"] * len(outputs)
+    vqa.model = MagicMock()
+    vqa.model.generate.side_effect = generate or (lambda n, pixel_values, **kw: [0] * n)
+    return vqa
+
+
+# Factory for VisualQA stubs; pass image_processor/generate to override a stage
+@pytest.fixture
+def make_vqa_stub():
+    return _make_vqa_stub
+
+
+# Parametrize with indirect=True over "stub" / "real" to pick the VQA implementation.
+# "stub" runs the real answer_questions loop against a fake processor/model.
+@pytest.fixture
+def vqa(request):
+    if request.param == "real":
+        return request.getfixturevalue("vqa_tester")
+    return _make_vqa_stub()
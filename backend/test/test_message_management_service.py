@@ -0,0 +1,47 @@
+import pytest
+
+from app.services import message_management_service
+from app.services.message_management_service import MessageManagementService
+
+LIMIT = 10
+
+
+@pytest.fixture
+def sanitize(monkeypatch):
+    monkeypatch.setattr(message_management_service, "MAX_CONTENT_LENGTH", LIMIT)
+    # Bypass __init__; _sanitize_content needs no repositories
+    service = object.__new__(MessageManagementService)
+    return service._sanitize_content
+
+
+def test_content_at_limit_with_trailing_blanks_is_not_truncated(sanitize):
+    content = "a" * LIMIT + " \x00\n" * 20
+    assert sanitize(content) == "a" * LIMIT
+
+
+def test_long_leading_whitespace_keeps_all_content(sanitize):
+    content = " " * 40 + "b" * LIMIT
+    assert sanitize(content) == "b" * LIMIT
+
+
+def test_null_bytes_do_not_count_towards_the_limit(sanitize):
+    content = "\x00".join("c" * LIMIT) + "\x00" * 20
+    assert sanitize(content) == "c" * LIMIT
+
+
+def test_content_over_limit_is_truncated(sanitize):
+    content = " " * 40 + "d" * LIMIT + "  e"
+    assert sanitize(content) == "d" * LIMIT + "... [truncated]"
+
+
+def test_real_limit_with_long_blank_tail_is_not_truncated():
+    limit = message_management_service.MAX_CONTENT_LENGTH
+    content = "a" * limit + "\x00" * limit + " \n" * 1024
+    service = object.__new__(MessageManagementService)
+
+    assert service._sanitize_content(content) == "a" * limit
+
+
+def test_short_content_is_cleaned(sanitize):
+    assert sanitize("  hi\x00 there \n") == "hi there"
+    assert sanitize([{"type": "text"}]) == [{"type": "text"}]
@@ -0,0 +1,80 @@
+import threading
+
+from app.services import redis_dataframe_service
+from app.services.redis_dataframe_service import _PipelinedWriter
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, command):
+        return lambda *args: self.commands.append((command, args))
+
+    def execute(self):
+        if self.client.fail:
+            raise ConnectionError("redis down")
+        self.client.executed.append(self.commands)
+        return [True] * len(self.commands)
+
+
+class FakeRedis:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return FakePipeline(self)
+
+
+def test_flush_without_writes_returns_immediately():
+    writer = _PipelinedWriter(FakeRedis())
+
+    assert writer.flush(timeout=1)
+    assert writer._thread is None  # no thread until the first write
+
+
+def test_submit_then_flush_sends_commands_in_order():
+    client = FakeRedis()
+    writer = _PipelinedWriter(client)
+
+    writer.submit("expire", "df:1", 60)
+    writer.submit("expire", "df:1:meta", 60)
+    assert writer.flush(timeout=1)
+
+    sent = [cmd for batch in client.executed for cmd in batch]
+    assert sent == [("expire", ("df:1", 60)), ("expire", ("df:1:meta", 60))]
+
+
+def test_full_batch_is_sent_without_flush(monkeypatch):
+    monkeypatch.setattr(redis_dataframe_service, "WRITE_BATCH_SIZE", 4)
+    # A very long interval: only the batch-size trigger can send these in time
+    monkeypatch.setattr(redis_dataframe_service, "WRITE_FLUSH_INTERVAL", 60)
+    client = FakeRedis()
+    sent = threading.Event()
+    execute = FakePipeline.execute
+
+    def execute_and_signal(pipe):
+        result = execute(pipe)
+        sent.set()
+        return result
+
+    monkeypatch.setattr(FakePipeline, "execute", execute_and_signal)
+    writer = _PipelinedWriter(client)
+
+    for i in range(4):
+        writer.submit("expire", f"df:{i}", 60)
+
+    assert sent.wait(timeout=5)
+    assert len(client.executed[0]) == 4
+
+
+def test_failed_pipeline_still_releases_flush():
+    writer = _PipelinedWriter(FakeRedis(fail=True))
+
+    writer.submit("expire", "df:1", 60)
+
+    assert writer.flush(timeout=1)
+    assert writer._pending == 0
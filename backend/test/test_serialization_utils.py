@@ -0,0 +1,49 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from app.utils.serialization_utils import safe_json_dumps, serialize_dataframe
+
+
+def test_nan_becomes_none():
+    df = pd.DataFrame({"x": [1.5, np.nan], "s": ["a", None]})
+    assert serialize_dataframe(df) == [{"x": 1.5, "s": "a"}, {"x": None, "s": None}]
+
+
+def test_datetime_and_nat():
+    ts = pd.Timestamp("2024-01-02 03:04:05")
+    df = pd.DataFrame({"t": [ts, pd.NaT]})
+    records = serialize_dataframe(df)
+
+    assert records[0]["t"] == ts
+    assert records[1]["t"] is None
+    assert safe_json_dumps(records) == '[{"t":"2024-01-02T03:04:05"},{"t":null}]'
+
+
+def test_decimal_values_keep_their_scale():
+    df = pd.DataFrame({"d": [Decimal("1.5"), Decimal("2.25")]})
+    records = serialize_dataframe(df)
+
+    assert [str(r["d"]) for r in records] == ["1.5", "2.25"]
+
+
+def test_dict_column_keys_are_not_merged():
+    # e.g. a JSON/JSONB column from read_sql_query
+    df = pd.DataFrame({"meta": [{"a": 1}, {"b": 2}]})
+    assert serialize_dataframe(df) == [{"meta": {"a": 1}}, {"meta": {"b": 2}}]
+
+
+def test_non_string_column_labels_are_preserved():
+    df = pd.DataFrame({0: [1, 2], "name": ["x", "y"]})
+    assert serialize_dataframe(df) == [{0: 1, "name": "x"}, {0: 2, "name": "y"}]
+
+
+def test_max_rows_and_plain_python_values():
+    df = pd.DataFrame({"i": np.arange(10, dtype=np.int64), "b": [True, False] * 5})
+    records = serialize_dataframe(df, max_rows=3)
+
+    assert records == [{"i": 0, "b": True}, {"i": 1, "b": False}, {"i": 2, "b": True}]
+    assert type(records[0]["i"]) is int
+    assert safe_json_dumps(records) == '[{"i":0,"b":true},{"i":1,"b":false},{"i":2,"b":true}]'
@@ -0,0 +1,86 @@
+import base64
+
+import httpx
+import pytest
+
+from app.services.storage_service import RESUMABLE_MAX_RETRIES, SupabaseStorageService
+
+UPLOAD_URL = "https://example.supabase.co/storage/v1/upload/resumable/abc"
+
+
+class FakeTusServer:
+    """Minimal TUS endpoint: create, PATCH at the current offset, HEAD for the offset."""
+
+    def __init__(self, fail_patches=(), partial_bytes=0):
+        self.received = bytearray()
+        self.create_headers = None
+        self.patches = 0
+        self.heads = 0
+        # PATCH calls (1-based) that fail after persisting partial_bytes of the chunk
+        self.fail_patches = set(fail_patches)
+        self.partial_bytes = partial_bytes
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            self.create_headers = request.headers
+            return httpx.Response(201, headers={"Location": UPLOAD_URL})
+
+        if request.method == "HEAD":
+            self.heads += 1
+            return httpx.Response(200, headers={"Upload-Offset": str(len(self.received))})
+
+        assert request.method == "PATCH"
+        self.patches += 1
+        assert int(request.headers["Upload-Offset"]) == len(self.received)
+        if self.patches in self.fail_patches or "*" in self.fail_patches:
+            self.received += request.content[:self.partial_bytes]
+            return httpx.Response(500)
+        self.received += request.content
+        return httpx.Response(204, headers={"Upload-Offset": str(len(self.received))})
+
+
+def make_service(server):
+    # Bypass __init__ so no Supabase client is created
+    service = object.__new__(SupabaseStorageService)
+    service.bucket_name = "plot-images"
+    service._resumable_url = "https://example.supabase.co/storage/v1/upload/resumable"
+    service._service_role_key = "service-key"
+    service._transport = httpx.MockTransport(server)
+    return service
+
+
+def test_resumable_upload_sends_all_chunks():
+    server = FakeTusServer()
+    data = bytes(range(10))
+
+    make_service(server)._upload_resumable("plots/a.png", data, "image/png", "60", chunk_size=4)
+
+    assert bytes(server.received) == data
+    assert server.patches == 3
+    assert server.heads == 0
+    assert server.create_headers["Upload-Length"] == "10"
+    metadata = dict(item.split(" ") for item in server.create_headers["Upload-Metadata"].split(","))
+    assert base64.b64decode(metadata["objectName"]) == b"plots/a.png"
+    assert base64.b64decode(metadata["bucketName"]) == b"plot-images"
+
+
+def test_failed_chunk_resumes_from_server_offset():
+    # Second PATCH persists 1 byte, then fails; the retry must start after that byte
+    server = FakeTusServer(fail_patches={2}, partial_bytes=1)
+    data = bytes(range(10))
+
+    make_service(server)._upload_resumable("plots/a.png", data, "image/png", "60", chunk_size=4)
+
+    assert bytes(server.received) == data
+    assert server.heads == 1
+    assert server.patches == 4
+
+
+def test_gives_up_after_max_retries():
+    server = FakeTusServer(fail_patches={"*"})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        make_service(server)._upload_resumable("plots/a.png", bytes(10), "image/png", "60", chunk_size=4)
+
+    assert server.patches == RESUMABLE_MAX_RETRIES + 1
+    assert server.heads == RESUMABLE_MAX_RETRIES
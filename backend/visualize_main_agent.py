@@ -22,11 +22,20 @@ if __name__ == "__main__":
         agent = MainAgent(
             llm=llm,
             db_path=db_path,
-            use_postgres_checkpointer=False
+            use_postgres_checkpointer=False,
+            render_graph=False
         )
         
         print("\n✅ MainAgent initialized successfully!")
-        print(f"📁 Graph visualization saved to: {agent.logs_dir}/main_agent_graph.png")
+        
+        # Only re-render the PNG when the graph structure changed since the last run
+        saved = agent.save_graph_visualization()
+        if saved is None:
+            print("\n❌ Failed to render graph visualization (see log for details)")
+        elif saved:
+            print(f"📁 Graph visualization saved to: {agent.logs_dir}/main_agent_graph.png")
+        else:
+            print(f"📁 Graph unchanged, using cached visualization: {agent.logs_dir}/main_agent_graph.png")
         
         # Print graph structure
         print("\n" + "="*60)
@@ -44,8 +53,11 @@ if __name__ == "__main__":
             print(f"   • {edge.source} → {edge.target}")
         
         print("\n" + "="*60)
-        print("\n✨ Visualization complete!")
-        print(f"\n💡 Check the PNG file at: {agent.logs_dir}/main_agent_graph.png")
+        if saved is None:
+            print("\n⚠️ Graph structure printed, but no PNG was rendered.")
+        else:
+            print("\n✨ Visualization complete!")
+            print(f"\n💡 Check the PNG file at: {agent.logs_dir}/main_agent_graph.png")
         
     except Exception as e:
         print(f"\n❌ Error: {e}")